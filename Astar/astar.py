@@ -1,26 +1,47 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from graph.heap import IndexedHeap
+
+
 class AStar:
 
-    def __init__(self, adjacency_list):
+    def __init__(self, adjacency_list, landmarks=()):
         self.adjacency_list = adjacency_list
+        self.stop_node = None
+
+        # Distances from each landmark to every node (the graph is undirected)
+        self.landmark_dist = [self.dijkstra(landmark) for landmark in landmarks]
 
     def get_neighbors(self, v):
         return self.adjacency_list[v]
 
+    def dijkstra(self, source):
+        dist = {source: 0}
+        heap = IndexedHeap()
+        heap.push(source, 0)
+
+        while heap:
+            d, v = heap.pop()
+            for (m, weight) in self.get_neighbors(v):
+                if m not in dist or d + weight < dist[m]:
+                    dist[m] = d + weight
+                    heap.push(m, d + weight)
+
+        return dist
+
     def h(self, n):
-        H = {
-            'A': 1,
-            'B': 1,
-            'C': 1,
-            'D': 1,
-            'E': 1,
-            'F': 1,
-            'G': 1,
-            'H': 1
-        }
-        return H[n]
+        # Triangle inequality: |d(L, stop) - d(L, n)| never overestimates d(n, stop)
+        return max((abs(dist[self.stop_node] - dist[n]) for dist in self.landmark_dist
+                    if n in dist and self.stop_node in dist), default=0)
 
     def a_star_algorithm(self, start_node, stop_node):
-        open_list = set([start_node])
+        self.stop_node = stop_node
+        # Open list keyed by node with priority g + h, so picking n needs no scan
+        open_list = IndexedHeap()
+        open_list.push(start_node, self.h(start_node))
         closed_list = set([])
 
         g = {}
@@ -30,15 +51,7 @@ class AStar:
         parents[start_node] = start_node
 
         while len(open_list) > 0:
-            n = None
-
-            for v in open_list:
-                if n is None or g[v] + self.h(v) < g[n] + self.h(n):
-                    n = v
-
-            if n is None:
-                print('Path does not exist!')
-                return None
+            _, n = open_list.pop()
 
             if n == stop_node:
                 reconst_path = []
@@ -55,21 +68,20 @@ class AStar:
                 print('Total cost: {}'.format(total_cost))
                 return reconst_path, total_cost
 
+            closed_list.add(n)
+
             for (m, weight) in self.get_neighbors(n):
                 if m not in open_list and m not in closed_list:
-                    open_list.add(m)
                     parents[m] = n
                     g[m] = g[n] + weight
+                    open_list.push(m, g[m] + self.h(m))
                 else:
                     if g[m] > g[n] + weight:
                         g[m] = g[n] + weight
                         parents[m] = n
                         if m in closed_list:
                             closed_list.remove(m)
-                            open_list.add(m)
-
-            open_list.remove(n)
-            closed_list.add(n)
+                        open_list.push(m, g[m] + self.h(m))
 
         print('Path does not exist!')
         return None
@@ -85,5 +97,5 @@ adjacency_list = {
     'H': [('C', 10), ('E', 5), ('G', 2)],
 }
 
-graph1 = AStar(adjacency_list)
+graph1 = AStar(adjacency_list, landmarks=('A', 'D'))
 graph1.a_star_algorithm('A', 'H')
\ No newline at end of file
@@ -1,32 +1,18 @@
-import csv
-import heapq
+import os
+import sys
 
-def importar_grafo_csv(nome_ficheiro):
-    mapa_nos = {}
-    arestas = []
-
-    with open("../" + nome_ficheiro, newline='', encoding='utf-8') as ficheiro:
-        leitor = csv.reader(ficheiro)
-        next(leitor)  # Ignora o cabeçalho
-
-        for linha in leitor:
-            origin_city, destination_city, toll, fuel, distance_km = linha[0], linha[1], float(linha[2]), float(
-                linha[3]), float(linha[4])
-            arestas.append((origin_city, destination_city, toll, fuel, distance_km))
-
-            if origin_city not in mapa_nos:
-                mapa_nos[origin_city] = len(mapa_nos)
-            if destination_city not in mapa_nos:
-                mapa_nos[destination_city] = len(mapa_nos)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
 
-    tamanho = len(mapa_nos)
-    matriz_adjacencia = [[None for _ in range(tamanho)] for _ in range(tamanho)]
+from graph.allpairs import AllPairs
+from graph.cache import route_cache, route_key
+from graph.heap import IndexedHeap
+from graph.heuristics import lower_bounds
+from graph.snapshot import load_graph
 
-    for origin_city, destination_city, toll, fuel, distance_km in arestas:
-        i, j = mapa_nos[origin_city], mapa_nos[destination_city]
-        matriz_adjacencia[i][j] = {'toll': toll, 'fuel': fuel, 'distance_km': distance_km}
-
-    return matriz_adjacencia, mapa_nos
+def importar_grafo_csv(nome_ficheiro):
+    # Grafo em CSR, mapeado do snapshot binário enquanto o CSV não mudar
+    grafo = load_graph("../" + nome_ficheiro)
+    return grafo, grafo.symbols
 
 def importar_grafo_csv_3():
     choice = -1
@@ -34,7 +20,7 @@ def importar_grafo_csv_3():
         choice = input("1. cidades.csv\n2. graph3.csv\n3. graph3_2.csv\n- ")
         if choice == "1":
             nome_ficheiro = "cidades.csv"
-            matriz, mapa_nos = importar_grafo_csv(nome_ficheiro)
+            grafo, mapa_nos = importar_grafo_csv(nome_ficheiro)
 
             cidades = sorted(mapa_nos.keys())
 
@@ -60,79 +46,115 @@ def importar_grafo_csv_3():
         elif choice == "3":
             return "graph3_2.csv", "A", "K"
 
-def a_star(matriz_adjacencia, mapa_nos, inicio, fim):
+def a_star(grafo, mapa_nos, inicio, fim, fila=None):
+    # fila: IndexedHeap opcional, para consultar os contadores depois da pesquisa (sem cache)
     # Verifica se as cidades de início e fim estão no mapa
     if inicio not in mapa_nos or fim not in mapa_nos:
         raise ValueError("Cidade de início ou fim não encontrada no mapa.")
 
+    # Com fila, quem chama quer os contadores desta pesquisa: a cache não a pode saltar
+    if fila is not None:
+        return pesquisar_a_star(grafo, mapa_nos, inicio, fim, fila)
+
+    # Pares repetidos vêm da cache de rotas, que é esvaziada quando os custos mudam
+    cache = route_cache(grafo)
+    chave = route_key(grafo, "a_star", inicio, fim)
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = pesquisar_a_star(grafo, mapa_nos, inicio, fim)
+        cache.put(chave, resultado)
+    return resultado
+
+def pesquisar_a_star(grafo, mapa_nos, inicio, fim, fila=None):
     # Índices das cidades de início e fim
     inicio_idx = mapa_nos[inicio]
     fim_idx = mapa_nos[fim]
 
-    # Fila de prioridade: (custo estimado, custo atual, nó atual, caminho)
-    fila = [(0, 0, inicio_idx, [inicio_idx])]
+    # Se o snapshot tiver as tabelas de todos os pares, basta consultá-las
+    tabelas = AllPairs.from_graph(grafo)
+    if tabelas is not None:
+        caminho = tabelas.path(inicio_idx, fim_idx)
+        if caminho is None:
+            return None, float('inf')
+        return mapa_nos.translate(caminho), tabelas.cost(inicio_idx, fim_idx)
+
+    # Custo de cada aresta (toll + fuel + distance_km), calculado uma só vez
+    custos_arestas = grafo.combined_cost()
+
+    # Limites inferiores até ao destino: landmarks do snapshot e/ou distância geográfica
+    estimativas = lower_bounds(grafo)
+    limites = estimativas.lower_bounds_to(fim_idx) if estimativas is not None else None
+
+    # Fila de prioridade endereçável: cada nó tem no máximo uma entrada, com prioridade (custo estimado, custo atual)
+    fila = IndexedHeap() if fila is None else fila
+    fila.push(inicio_idx, (0, 0))
 
     # Dicionário para armazenar os custos mínimos até cada nó
     custos_minimos = {inicio_idx: 0}
 
+    # Pai de cada nó no melhor caminho conhecido; o caminho só é montado no fim
+    pais = {inicio_idx: None}
+
     while fila:
         # Pega o nó com o menor custo estimado
-        custo_estimado, custo_atual, no_atual, caminho = heapq.heappop(fila)
+        (custo_estimado, custo_atual), no_atual = fila.pop()
 
         # Se chegamos ao destino, retorna o caminho e o custo
         if no_atual == fim_idx:
-            caminho_cidades = [list(mapa_nos.keys())[idx] for idx in caminho]
+            caminho_cidades = mapa_nos.translate(reconstruir_caminho(pais, fim_idx))
             return caminho_cidades, custo_atual
 
-        # Explora os vizinhos do nó atual
-        for vizinho, dados in enumerate(matriz_adjacencia[no_atual]):
-            if dados is not None:  # Se há uma conexão
-                # Calcula o novo custo (soma de toll, fuel e distance_km)
-                novo_custo = custo_atual + dados['toll'] + dados['fuel'] + dados['distance_km']
-
-                # Se o vizinho não foi visitado ou encontramos um caminho mais barato
-                if vizinho not in custos_minimos or novo_custo < custos_minimos[vizinho]:
-                    custos_minimos[vizinho] = novo_custo
-                    # Estimativa heurística (neste caso, usamos 0 por simplicidade)
-                    heuristica = 0
-                    custo_estimado = novo_custo + heuristica
-                    # Adiciona o vizinho à fila de prioridade
-                    heapq.heappush(fila, (custo_estimado, novo_custo, vizinho, caminho + [vizinho]))
+        # Explora só as arestas que saem do nó atual
+        for vizinho, custo_aresta in grafo.out_edges(no_atual, custos_arestas):
+            novo_custo = custo_atual + custo_aresta
+
+            # Se o vizinho não foi visitado ou encontramos um caminho mais barato
+            if vizinho not in custos_minimos or novo_custo < custos_minimos[vizinho]:
+                custos_minimos[vizinho] = novo_custo
+                pais[vizinho] = no_atual
+                # Estimativa heurística: limite inferior, ou 0 sem landmarks nem coordenadas
+                heuristica = limites[vizinho] if limites is not None else 0
+                if heuristica == float('inf'):
+                    continue  # O destino não é alcançável a partir deste vizinho
+                custo_estimado = novo_custo + heuristica
+                # Adiciona o vizinho à fila, ou baixa a prioridade da entrada que já lá está
+                fila.push(vizinho, (custo_estimado, novo_custo))
 
     # Se não encontrou um caminho
     return None, float('inf')
 
+# Segue os pais desde o destino até ao início
+def reconstruir_caminho(pais, no):
+    caminho = []
+    while no is not None:
+        caminho.append(no)
+        no = pais[no]
+    caminho.reverse()
+    return caminho
+
 # Função para calcular os custos individuais de um caminho
-def calcular_custos_individuais(nome_ficheiro, matriz_adjacencia, mapa_nos, caminho):
-    toll_total = 0
-    fuel_total = 0
-    distance_total = 0
-
-    for i in range(len(caminho) - 1):
-        origem_idx = mapa_nos[caminho[i]]
-        destino_idx = mapa_nos[caminho[i + 1]]
-        dados = matriz_adjacencia[origem_idx][destino_idx]
-        toll_total += dados['toll']
-        fuel_total += dados['fuel']
-        distance_total += dados['distance_km']
-
-    return toll_total, fuel_total, distance_total
-
-nome_ficheiro, inicio, fim = importar_grafo_csv_3()
-matriz_adjacencia, mapa_nos = importar_grafo_csv(nome_ficheiro)
-
-# Encontrar o caminho de menor custo entre as cidades
-caminho, custo_total = a_star(matriz_adjacencia, mapa_nos, inicio, fim)
-
-# Exibir o resultado
-if caminho:
-    print(f"\nCaminho encontrado: {' -> '.join(caminho)}")
-    print(f"Custo total: {custo_total}")
-
-    # Calcular e exibir os custos individuais
-    toll_total, fuel_total, distance_total = calcular_custos_individuais(nome_ficheiro, matriz_adjacencia, mapa_nos, caminho)
-    print(f"Km Cost: {distance_total}")
-    print(f"Toll Cost: {toll_total}")
-    print(f"Fuel Cost: {fuel_total}")
-else:
-    print("\nNão foi possível encontrar um caminho.")
+def calcular_custos_individuais(nome_ficheiro, grafo, mapa_nos, caminho):
+    custos = grafo.path_costs(mapa_nos.indices(caminho))
+    return custos['toll'], custos['fuel'], custos['distance_km']
+
+if __name__ == "__main__":
+    nome_ficheiro, inicio, fim = importar_grafo_csv_3()
+    grafo, mapa_nos = importar_grafo_csv(nome_ficheiro)
+
+    # Encontrar o caminho de menor custo entre as cidades
+    fila = IndexedHeap()
+    caminho, custo_total = a_star(grafo, mapa_nos, inicio, fim, fila)
+
+    # Exibir o resultado
+    if caminho:
+        print(f"\nCaminho encontrado: {' -> '.join(caminho)}")
+        print(f"Custo total: {custo_total}")
+
+        # Calcular e exibir os custos individuais
+        toll_total, fuel_total, distance_total = calcular_custos_individuais(nome_ficheiro, grafo, mapa_nos, caminho)
+        print(f"Km Cost: {distance_total}")
+        print(f"Toll Cost: {toll_total}")
+        print(f"Fuel Cost: {fuel_total}")
+        print(f"Nós expandidos: {fila.pops}, entradas repetidas evitadas: {fila.decreases}")
+    else:
+        print("\nNão foi possível encontrar um caminho.")
@@ -1,84 +1,42 @@
-import csv
-import heapq
+import os
+import sys
+from itertools import islice
 
-def importar_grafo_csv(nome_ficheiro):
-    mapa_nos = {}
-    arestas = []
-
-    try:
-        with open("../"+nome_ficheiro, newline='', encoding='utf-8') as ficheiro:
-            leitor = csv.reader(ficheiro)
-            next(leitor)  # Ignorar cabeçalho
-
-            for linha in leitor:
-                origin_city, destination_city, toll, fuel, distance_km = linha[0], linha[1], float(linha[2]), float(
-                    linha[3]), float(linha[4])
-                arestas.append((origin_city, destination_city, toll, fuel, distance_km))
-
-                if origin_city not in mapa_nos:
-                    mapa_nos[origin_city] = len(mapa_nos)
-                if destination_city not in mapa_nos:
-                    mapa_nos[destination_city] = len(mapa_nos)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
 
-        tamanho = len(mapa_nos)
-        matriz_adjacencia = [[None for _ in range(tamanho)] for _ in range(tamanho)]
+from graph.kpaths import k_shortest_paths
+from graph.snapshot import load_graph
 
-        for origin_city, destination_city, toll, fuel, distance_km in arestas:
-            i, j = mapa_nos[origin_city], mapa_nos[destination_city]
-            matriz_adjacencia[i][j] = {'toll': toll, 'fuel': fuel, 'distance_km': distance_km}
+# Quantos caminhos alternativos mostrar por omissão
+K_CAMINHOS = 10
 
-        return matriz_adjacencia, mapa_nos
+def importar_grafo_csv(nome_ficheiro):
+    try:
+        grafo = load_graph("../" + nome_ficheiro)
+        return grafo, grafo.symbols
 
     except FileNotFoundError:
         print(f"Erro: O ficheiro '{nome_ficheiro}' não foi encontrado.")
         exit()
 
 
-import heapq
+def a_star_todos_caminhos(grafo, mapa_nos, inicio, fim, k=K_CAMINHOS, custo_maximo=None):
+    """Os k caminhos simples mais baratos (todos, com k=None), por ordem de custo e até custo_maximo"""
+    return list(islice(caminhos_por_custo(grafo, mapa_nos, inicio, fim, custo_maximo), k))
+
 
-def a_star_todos_caminhos(matriz_adjacencia, mapa_nos, inicio, fim):
+def caminhos_por_custo(grafo, mapa_nos, inicio, fim, custo_maximo=None):
+    # Gerador: cada caminho só é calculado quando é pedido
     if inicio not in mapa_nos or fim not in mapa_nos:
         raise ValueError("Cidade de início ou fim não encontrada no mapa.")
 
-    inicio_idx = mapa_nos[inicio]
-    fim_idx = mapa_nos[fim]
-
-    fila = [(0, 0, inicio_idx, [inicio_idx])]  # (Custo estimado, Custo real, Nó atual, Caminho percorrido)
-    caminhos = []
-    visitados = set()  # Conjunto para evitar ciclos e loops infinitos
-
-    while fila:
-        custo_estimado, custo_atual, no_atual, caminho = heapq.heappop(fila)
+    custos_arestas = grafo.combined_cost()
+    return k_shortest_paths(grafo, mapa_nos[inicio], mapa_nos[fim], custos_arestas, max_cost=custo_maximo)
 
-        if no_atual == fim_idx:
-            caminhos.append((caminho, custo_atual))
-            continue
 
-        if no_atual in visitados:
-            continue  # Pula se já foi visitado
-
-        visitados.add(no_atual)
-
-        for vizinho, dados in enumerate(matriz_adjacencia[no_atual]):
-            if dados is not None and vizinho not in caminho:  # Evita revisitar
-                novo_custo = custo_atual + dados['toll'] + dados['fuel'] + dados['distance_km']
-                heapq.heappush(fila, (novo_custo, novo_custo, vizinho, caminho + [vizinho]))
-
-    return caminhos
-
-
-
-def calcular_custos_individuais(matriz_adjacencia, caminho):
-    toll_total, fuel_total, distance_total = 0, 0, 0
-
-    for i in range(len(caminho) - 1):
-        origem_idx, destino_idx = caminho[i], caminho[i + 1]
-        dados = matriz_adjacencia[origem_idx][destino_idx]
-        toll_total += dados['toll']
-        fuel_total += dados['fuel']
-        distance_total += dados['distance_km']
-
-    return toll_total, fuel_total, distance_total
+def calcular_custos_individuais(grafo, caminho):
+    custos = grafo.path_costs(caminho)
+    return custos['toll'], custos['fuel'], custos['distance_km']
 
 
 def importar_grafo_csv_3():
@@ -88,7 +46,7 @@ def importar_grafo_csv_3():
 
         if choice == "1":
             nome_ficheiro = "cidades.csv"
-            matriz, mapa_nos = importar_grafo_csv(nome_ficheiro)
+            grafo, mapa_nos = importar_grafo_csv(nome_ficheiro)
 
             cidades = sorted(mapa_nos.keys())
             print("\nCidades disponíveis:")
@@ -121,23 +79,24 @@ def importar_grafo_csv_3():
             print("Escolha inválida. Tente novamente.")
 
 
-# Chamar o menu para o usuário escolher o arquivo e cidades
-nome_ficheiro, inicio, fim = importar_grafo_csv_3()
-
-if nome_ficheiro and inicio and fim:
-    # Continuar com o carregamento do grafo e cálculo do caminho, por exemplo
-    matriz, mapa_nos = importar_grafo_csv(nome_ficheiro)
-    caminhos = a_star_todos_caminhos(matriz, mapa_nos, inicio, fim)
-
-    if caminhos:
-        print(f"\nForam encontrados {len(caminhos)} caminhos:")
-        for i, (caminho, custo_total) in enumerate(caminhos, 1):
-            caminho_cidades = [list(mapa_nos.keys())[idx] for idx in caminho]
-            toll_total, fuel_total, distance_total = calcular_custos_individuais(matriz, caminho)
-            print(f"\nCaminho {i}: {' -> '.join(caminho_cidades)}")
-            print(f"Custo total: {custo_total}")
-            print(f"Distância total: {distance_total} km")
-            print(f"Pedágio total: {toll_total}")
-            print(f"Combustível total: {fuel_total}")
-    else:
-        print("\nNão foi possível encontrar um caminho.")
+if __name__ == "__main__":
+    # Chamar o menu para o usuário escolher o arquivo e cidades
+    nome_ficheiro, inicio, fim = importar_grafo_csv_3()
+
+    if nome_ficheiro and inicio and fim:
+        # Continuar com o carregamento do grafo e cálculo do caminho, por exemplo
+        grafo, mapa_nos = importar_grafo_csv(nome_ficheiro)
+        caminhos = a_star_todos_caminhos(grafo, mapa_nos, inicio, fim)
+
+        if caminhos:
+            print(f"\nForam encontrados {len(caminhos)} caminhos:")
+            for i, (caminho, custo_total) in enumerate(caminhos, 1):
+                caminho_cidades = mapa_nos.translate(caminho)
+                toll_total, fuel_total, distance_total = calcular_custos_individuais(grafo, caminho)
+                print(f"\nCaminho {i}: {' -> '.join(caminho_cidades)}")
+                print(f"Custo total: {custo_total}")
+                print(f"Distância total: {distance_total} km")
+                print(f"Pedágio total: {toll_total}")
+                print(f"Combustível total: {fuel_total}")
+        else:
+            print("\nNão foi possível encontrar um caminho.")
\ No newline at end of file
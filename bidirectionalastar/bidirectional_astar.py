@@ -1,104 +1,111 @@
-#TODO ValueError: could not convert string to float: 'distancia'
+import os
+import sys
 
-import csv
-import heapq
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
 
-def load_graph_from_csv(file_path):
-    graph = {}
-
-    with open(file_path, "r") as file:
-        reader = csv.reader(file)
-        next(reader)  # Pula a primeira linha (cabeçalho)
-
-        for row in reader:
-            try:
-                node1, node2, cost = row[0], row[1], float(row[2])
-                if node1 not in graph:
-                    graph[node1] = []
-                if node2 not in graph:
-                    graph[node2] = []
-                graph[node1].append((node2, cost))
-                graph[node2].append((node1, cost))
-            except ValueError:
-                print(f"Erro ao converter a linha: {row}")
+from graph.cache import route_cache, route_key
+from graph.heap import IndexedHeap
+from graph.heuristics import lower_bounds
+from graph.snapshot import load_graph
 
-    return graph
+def load_graph_from_csv(file_path):
+    # graph.csv is undirected: every edge is stored in both directions
+    return load_graph(file_path, columns=("distancia",), symmetric=True)
 
 
 
 class BidirectionalAStarGraph:
     def __init__(self, graph, start, goal, heuristic_type="euclidean"):
         self.graph = graph
-        self.start = start
-        self.goal = goal
+        self.start = graph.symbols[start]
+        self.goal = graph.symbols[goal]
         self.heuristic_type = heuristic_type
+        self.edge_cost = graph.column("distancia")
+
+        # Potentials from the landmarks and node coordinates the graph carries
+        bounds = lower_bounds(graph)
+        self.potentials = bounds.bidirectional_potentials(self.start, self.goal) \
+            if bounds is not None else None
 
-        self.open_fwd = []
-        self.open_bwd = []
+        self.open_fwd = IndexedHeap()
+        self.open_bwd = IndexedHeap()
         self.closed_fwd = set()
         self.closed_bwd = set()
-        self.g_fwd = {start: 0}
-        self.g_bwd = {goal: 0}
-        self.parents_fwd = {start: None}
-        self.parents_bwd = {goal: None}
+        self.g_fwd = {self.start: 0}
+        self.g_bwd = {self.goal: 0}
+        self.parents_fwd = {self.start: None}
+        self.parents_bwd = {self.goal: None}
+        self.best_cost = float('inf')  # mu, the cheapest start-goal path seen so far
+        self.meeting_point = None
 
-        heapq.heappush(self.open_fwd, (self.h(start, goal), start))
-        heapq.heappush(self.open_bwd, (self.h(goal, start), goal))
+        self.open_fwd.push(self.start, self.h(self.start, self.goal))
+        self.open_bwd.push(self.goal, self.h(self.goal, self.start))
 
     def h(self, node1, node2):
-        return 0
+        if self.potentials is None:
+            return 0
+        h_fwd, h_bwd = self.potentials
+        return h_fwd[node1] if node2 == self.goal else h_bwd[node1]
 
     def search(self):
-        meeting_point = None
+        # Identical queries on an unchanged graph are answered from the route cache
+        cache = route_cache(self.graph)
+        key = route_key(self.graph, "bidirectional_astar", self.start, self.goal)
+        result = cache.get(key)
+        if result is None:
+            result = self.run_search()
+            cache.put(key, result)
+        return result
+
+    def run_search(self):
+        """
+        Keeps the best meeting cost mu and stops once the two queue minima add up
+        to it; with the averaged potentials no cheaper path can be left. Each step
+        expands the smaller frontier (the lower key on a tie).
+        """
+        self.best_cost = 0 if self.start == self.goal else float('inf')
+        self.meeting_point = self.start if self.start == self.goal else None
 
         while self.open_fwd and self.open_bwd:
-            if self.expand_front():
-                meeting_point = self.open_fwd[0][1]
-                break
-            if self.expand_back():
-                meeting_point = self.open_bwd[0][1]
+            key_fwd, key_bwd = self.open_fwd.peek()[0], self.open_bwd.peek()[0]
+            if key_fwd + key_bwd >= self.best_cost:
                 break
+            if (len(self.open_fwd), key_fwd) <= (len(self.open_bwd), key_bwd):
+                self.expand_front()
+            else:
+                self.expand_back()
 
-        return self.extract_path(meeting_point), self.g_fwd.get(meeting_point, float('inf')) + self.g_bwd.get(
-            meeting_point, float('inf'))
+        return self.extract_path(self.meeting_point), self.best_cost
 
     def expand_front(self):
-        if not self.open_fwd:
-            return False
-
-        _, current = heapq.heappop(self.open_fwd)
-        if current in self.closed_bwd:
-            return True
-
+        _, current = self.open_fwd.pop()
         self.closed_fwd.add(current)
 
-        for neighbor, cost in self.graph.get(current, []):
+        for neighbor, cost in self.graph.out_edges(current, self.edge_cost):
             new_cost = self.g_fwd[current] + cost
             if neighbor not in self.g_fwd or new_cost < self.g_fwd[neighbor]:
                 self.g_fwd[neighbor] = new_cost
                 self.parents_fwd[neighbor] = current
-                heapq.heappush(self.open_fwd, (new_cost + self.h(neighbor, self.goal), neighbor))
-
-        return False
+                self.open_fwd.push(neighbor, new_cost + self.h(neighbor, self.goal))
+                self.update_meeting(neighbor)
 
     def expand_back(self):
-        if not self.open_bwd:
-            return False
-
-        _, current = heapq.heappop(self.open_bwd)
-        if current in self.closed_fwd:
-            return True
-
+        _, current = self.open_bwd.pop()
         self.closed_bwd.add(current)
 
-        for neighbor, cost in self.graph.get(current, []):
+        for neighbor, cost in self.graph.in_edges(current, self.edge_cost):
             new_cost = self.g_bwd[current] + cost
             if neighbor not in self.g_bwd or new_cost < self.g_bwd[neighbor]:
                 self.g_bwd[neighbor] = new_cost
                 self.parents_bwd[neighbor] = current
-                heapq.heappush(self.open_bwd, (new_cost + self.h(neighbor, self.start), neighbor))
+                self.open_bwd.push(neighbor, new_cost + self.h(neighbor, self.start))
+                self.update_meeting(neighbor)
 
-        return False
+    def update_meeting(self, node):
+        # Every change to either g is checked, so mu covers every node reached from both sides
+        if node in self.g_fwd and node in self.g_bwd and self.g_fwd[node] + self.g_bwd[node] < self.best_cost:
+            self.best_cost = self.g_fwd[node] + self.g_bwd[node]
+            self.meeting_point = node
 
     def extract_path(self, meeting_point):
         if meeting_point is None:
@@ -106,18 +113,18 @@ class BidirectionalAStarGraph:
 
         path_fwd = []
         node = meeting_point
-        while node:
+        while node is not None:
             path_fwd.append(node)
             node = self.parents_fwd.get(node)
         path_fwd.reverse()
 
         path_bwd = []
         node = self.parents_bwd.get(meeting_point)
-        while node:
+        while node is not None:
             path_bwd.append(node)
             node = self.parents_bwd.get(node)
 
-        return path_fwd + path_bwd
+        return self.graph.symbols.translate(path_fwd + path_bwd)
 
 
 if __name__ == "__main__":
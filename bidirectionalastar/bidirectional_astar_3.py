@@ -1,27 +1,37 @@
 import os
 import sys
 import math
-import heapq
-import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../../bidirectionalastar/")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from graph.cache import route_cache, route_key
+from graph.ch import ContractionHierarchy
+from graph.heap import IndexedHeap
+from graph.heuristics import lower_bounds
+from graph.snapshot import load_graph
 
 class BidirectionalAStar:
     def __init__(self, s_start, s_goal, heuristic_type, graph, weights):
-        self.s_start = s_start
-        self.s_goal = s_goal
+        self.s_start = graph.symbols[s_start]
+        self.s_goal = graph.symbols[s_goal]
         self.heuristic_type = heuristic_type
-        self.graph = graph  # adjacency list representation of graph
+        self.graph = graph  # CSRGraph with kms, litros and minutos columns
         self.weights = weights  # Weights for kms, litros, and minutos
+        self.edge_cost = graph.weighted_cost(weights)
+
+        self.potentials = self._potentials()
 
-        self.OPEN_fore = []
-        self.OPEN_back = []
+        self.OPEN_fore = IndexedHeap()  # one entry per node, lowered in place on a better g
+        self.OPEN_back = IndexedHeap()
         self.CLOSED_fore = set()
         self.CLOSED_back = set()
         self.PARENT_fore = {}
         self.PARENT_back = {}
         self.g_fore = {}
         self.g_back = {}
+        self.mu = math.inf  # cheapest start-goal path seen so far
+        self.s_meet = None
 
     def init(self):
         self.g_fore[self.s_start] = 0.0
@@ -29,52 +39,78 @@ class BidirectionalAStar:
         self.PARENT_fore[self.s_start] = None
         self.PARENT_back[self.s_goal] = None
 
-        heapq.heappush(self.OPEN_fore, (self.f_value_fore(self.s_start), self.s_start))
-        heapq.heappush(self.OPEN_back, (self.f_value_back(self.s_goal), self.s_goal))
+        self.OPEN_fore.push(self.s_start, self.f_value_fore(self.s_start))
+        self.OPEN_back.push(self.s_goal, self.f_value_back(self.s_goal))
 
     def searching(self):
-        """Perform bidirectional A* search."""
+        """
+        Perform bidirectional A* search, reusing the cached result of an identical
+        query. The cache keeps only the path and its cost (in self.mu), so on a hit
+        nothing is expanded and both CLOSED sets come back empty.
+        """
+        cache = route_cache(self.graph)
+        key = route_key(self.graph, type(self).__name__, self.s_start, self.s_goal, self.weights)
+        cached = cache.get(key)
+        if cached is not None:
+            path, self.mu = cached
+            return path, self.CLOSED_fore, self.CLOSED_back
+        result = self.search()
+        cache.put(key, (result[0], self.mu))
+        return result
+
+    def search(self):
+        """
+        Keeps the best meeting cost mu and stops once the two queue minima add up
+        to it: with the averaged potentials no cheaper path can be left. Each step
+        expands the smaller frontier, or the one with the lower key on a tie.
+        """
         self.init()
-        s_meet = None
+        if self.s_start == self.s_goal:
+            self.mu, self.s_meet = 0.0, self.s_start
 
         while self.OPEN_fore and self.OPEN_back:
-            _, s_fore = heapq.heappop(self.OPEN_fore)
-            if s_fore in self.PARENT_back:
-                s_meet = s_fore
+            key_fore, key_back = self.OPEN_fore.peek()[0], self.OPEN_back.peek()[0]
+            if key_fore + key_back >= self.mu:
                 break
-
-            self.CLOSED_fore.add(s_fore)
-
-            for s_n in self.get_neighbors(s_fore):
-                new_cost = self.g_fore[s_fore] + self.cost(s_fore, s_n)
-                if s_n not in self.g_fore or new_cost < self.g_fore[s_n]:
-                    self.g_fore[s_n] = new_cost
-                    self.PARENT_fore[s_n] = s_fore
-                    heapq.heappush(self.OPEN_fore, (self.f_value_fore(s_n), s_n))
-
-            _, s_back = heapq.heappop(self.OPEN_back)
-            if s_back in self.PARENT_fore:
-                s_meet = s_back
-                break
-
-            self.CLOSED_back.add(s_back)
-
-            for s_n in self.get_neighbors(s_back):
-                new_cost = self.g_back[s_back] + self.cost(s_back, s_n)
-                if s_n not in self.g_back or new_cost < self.g_back[s_n]:
-                    self.g_back[s_n] = new_cost
-                    self.PARENT_back[s_n] = s_back
-                    heapq.heappush(self.OPEN_back, (self.f_value_back(s_n), s_n))
-
-        if s_meet:
-            return self.extract_path(s_meet), self.CLOSED_fore, self.CLOSED_back
+            if (len(self.OPEN_fore), key_fore) <= (len(self.OPEN_back), key_back):
+                _, s_fore = self.OPEN_fore.pop()
+                self.CLOSED_fore.add(s_fore)
+                for s_n, edge_cost in self.graph.out_edges(s_fore, self.edge_cost):
+                    new_cost = self.g_fore[s_fore] + edge_cost
+                    if s_n not in self.g_fore or new_cost < self.g_fore[s_n]:
+                        self.g_fore[s_n] = new_cost
+                        self.PARENT_fore[s_n] = s_fore
+                        self.OPEN_fore.push(s_n, self.f_value_fore(s_n))
+                        self.update_meeting(s_n)
+            else:
+                _, s_back = self.OPEN_back.pop()
+                self.CLOSED_back.add(s_back)
+                for s_n, edge_cost in self.graph.in_edges(s_back, self.edge_cost):
+                    new_cost = self.g_back[s_back] + edge_cost
+                    if s_n not in self.g_back or new_cost < self.g_back[s_n]:
+                        self.g_back[s_n] = new_cost
+                        self.PARENT_back[s_n] = s_back
+                        self.OPEN_back.push(s_n, self.f_value_back(s_n))
+                        self.update_meeting(s_n)
+
+        if self.s_meet is not None:
+            return self.extract_path(self.s_meet), self.CLOSED_fore, self.CLOSED_back
         else:
             return None, self.CLOSED_fore, self.CLOSED_back
 
+    def update_meeting(self, s):
+        # Checked on every change to either g, so mu covers every node reached from both sides
+        if s in self.g_fore and s in self.g_back and self.g_fore[s] + self.g_back[s] < self.mu:
+            self.mu = self.g_fore[s] + self.g_back[s]
+            self.s_meet = s
+
     def get_neighbors(self, s):
-        return self.graph.get(s, {}).keys()
+        return self.graph.neighbors(s)
 
     def extract_path(self, s_meet):
+        return self.graph.symbols.translate(self.node_path(s_meet))
+
+    def node_path(self, s_meet):
         path_fore = []
         s = s_meet
         while s is not None:
@@ -89,6 +125,13 @@ class BidirectionalAStar:
 
         return list(reversed(path_fore)) + path_back
 
+    def _potentials(self):
+        """Potentials from the landmarks and node coordinates available for these weights"""
+        bounds = lower_bounds(self.graph, self.weights)
+        if bounds is None:
+            return None
+        return bounds.bidirectional_potentials(self.s_start, self.s_goal)
+
     def f_value_fore(self, s):
         return self.g_fore.get(s, math.inf) + self.h(s, self.s_goal)
 
@@ -96,40 +139,71 @@ class BidirectionalAStar:
         return self.g_back.get(s, math.inf) + self.h(s, self.s_start)
 
     def h(self, s, goal):
-        return 0
+        if self.potentials is None:
+            return 0
+        h_fore, h_back = self.potentials
+        return h_fore[s] if goal == self.s_goal else h_back[s]
 
     def cost(self, s_start, s_goal):
-        edge = self.graph[s_start][s_goal]
-        return (self.weights['kms'] * edge['kms'] +
-                self.weights['litros'] * edge['litros'] +
-                self.weights['minutos'] * edge['minutos'])
+        return float(self.edge_cost[self.graph.edge_id(s_start, s_goal)])
 
-def load_graph_from_csv(filename):
-    df = pd.read_csv(filename, header=None, names=["start", "end", "kms", "litros", "minutos"])
-
-    # Converte para float e força erros a serem substituídos por NaN
-    df["kms"] = pd.to_numeric(df["kms"], errors="coerce")
-    df["litros"] = pd.to_numeric(df["litros"], errors="coerce")
-    df["minutos"] = pd.to_numeric(df["minutos"], errors="coerce")
+class ContractionHierarchyAStar(BidirectionalAStar):
+    """Bidirectional search that only climbs a contraction hierarchy from both ends"""
 
-    # Substitui valores NaN por 0 (ou algum outro valor apropriado)
-    df.fillna(0, inplace=True)
+    def __init__(self, s_start, s_goal, heuristic_type, graph, weights, hierarchy):
+        super().__init__(s_start, s_goal, heuristic_type, graph, weights)
+        self.hierarchy = hierarchy
 
-    graph = {}
+    def _potentials(self):
+        return None  # Upward searches are plain Dijkstra
 
-    for _, row in df.iterrows():
-        start, end = row["start"], row["end"]
-        edge_data = {"kms": row["kms"], "litros": row["litros"], "minutos": row["minutos"]}
-
-        if start not in graph:
-            graph[start] = {}
-        if end not in graph:
-            graph[end] = {}
+    def search(self):
+        """
+        Both searches run until their queue minimum reaches the best meeting cost.
+        A node that a more important node already reached reaches more cheaply is
+        stalled: its distance is not the shortest, so its edges are not followed.
+        """
+        self.init()
+        best, s_meet = math.inf, None
+        forward = (self.OPEN_fore, self.CLOSED_fore, self.g_fore, self.PARENT_fore,
+                   self.hierarchy.up_edges, self.hierarchy.down_edges, self.g_back)
+        backward = (self.OPEN_back, self.CLOSED_back, self.g_back, self.PARENT_back,
+                    self.hierarchy.down_edges, self.hierarchy.up_edges, self.g_fore)
+
+        while True:
+            sides = [side for side in (forward, backward) if side[0] and side[0].peek()[0] < best]
+            if not sides:
+                break
+            for open_set, closed, g, parent, edges, stall_edges, g_other in sides:
+                if not open_set or open_set.peek()[0] >= best:
+                    continue
+                d, s = open_set.pop()
+                closed.add(s)
+                if s in g_other and d + g_other[s] < best:
+                    best, s_meet = d + g_other[s], s
+                if any(g.get(s_h, math.inf) + edge_cost < d for s_h, edge_cost in stall_edges(s)):
+                    continue
+
+                for s_n, edge_cost in edges(s):
+                    new_cost = d + edge_cost
+                    if new_cost < g.get(s_n, math.inf):
+                        g[s_n] = new_cost
+                        parent[s_n] = s
+                        open_set.push(s_n, new_cost)
+
+        self.mu, self.s_meet = best, s_meet
+        if s_meet is not None:
+            return self.extract_path(s_meet), self.CLOSED_fore, self.CLOSED_back
+        else:
+            return None, self.CLOSED_fore, self.CLOSED_back
 
-        graph[start][end] = edge_data
-        graph[end][start] = edge_data
+    def node_path(self, s_meet):
+        # The meeting path runs over shortcuts: expand them back to original edges
+        return self.hierarchy.unpack(super().node_path(s_meet))
 
-    return graph
+def load_graph_from_csv(filename):
+    # A header row is skipped, any other non-numeric cost is an error; every edge goes both ways
+    return load_graph(filename, columns=("kms", "litros", "minutos"), symmetric=True)
 
 def main():
     choice = input("1. cidades.csv\n2. graph3.csv\n3. graph3_2.csv\n- ")
@@ -156,30 +230,31 @@ def main():
 
     weights = {"kms": 1.0, "litros": 1.0, "minutos": 1.0}
 
-    bastar = BidirectionalAStar(start_node, goal_node, "none", graph, weights)
+    # Use the contraction hierarchy when the snapshot carries one for these weights
+    hierarchy = ContractionHierarchy.from_graph(graph, weights)
+    if hierarchy is not None:
+        bastar = ContractionHierarchyAStar(start_node, goal_node, "none", graph, weights, hierarchy)
+    else:
+        bastar = BidirectionalAStar(start_node, goal_node, "none", graph, weights)
     path, visited_fore, visited_back = bastar.searching()
 
     if path:
         print("Optimal path:", path)
 
-        total_kms = 0
-        total_litros = 0
-        total_minutos = 0
-
-        for i in range(len(path) - 1):
-            start = path[i]
-            end = path[i + 1]
-            edge_data = graph[start][end]
-
-            total_kms += edge_data['kms']
-            total_litros += edge_data['litros']
-            total_minutos += edge_data['minutos']
+        totals = graph.path_costs(graph.symbols.indices(path))
+        total_kms = totals['kms']
+        total_litros = totals['litros']
+        total_minutos = totals['minutos']
 
         print("\nTotal Cost:")
         print(f"Total kms: {total_kms}")
         print(f"Total litros: {total_litros}")
         print(f"Total minutos: {total_minutos}")
 
+        heaps = (bastar.OPEN_fore, bastar.OPEN_back)
+        print(f"\nExpanded nodes: {sum(h.pops for h in heaps)}, "
+              f"duplicate heap entries avoided: {sum(h.decreases for h in heaps)}")
+
     else:
         print("No path found between", start_node, "and", goal_node)
 
@@ -1,135 +1,165 @@
-import csv
 import os
 import sys
 import math
-import heapq
-import pandas as pd
+from itertools import islice
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../../bidirectionalastar/")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
 
-def importar_grafo_csv(nome_ficheiro):
-    mapa_nos = {}
-    arestas = []
+from graph.heap import IndexedHeap
+from graph.heuristics import lower_bounds
+from graph.snapshot import load_graph
 
-    with open(nome_ficheiro, newline='', encoding='utf-8') as ficheiro:
-        leitor = csv.reader(ficheiro)
-        next(leitor)  # Ignora o cabeçalho
-
-        for linha in leitor:
-            origin_city, destination_city, toll, fuel, distance_km = linha[0], linha[1], float(linha[2]), float(
-                linha[3]), float(linha[4])
-            arestas.append((origin_city, destination_city, toll, fuel, distance_km))
-
-            if origin_city not in mapa_nos:
-                mapa_nos[origin_city] = len(mapa_nos)
-            if destination_city not in mapa_nos:
-                mapa_nos[destination_city] = len(mapa_nos)
-
-    tamanho = len(mapa_nos)
-    matriz_adjacencia = [[None for _ in range(tamanho)] for _ in range(tamanho)]
-
-    for origin_city, destination_city, toll, fuel, distance_km in arestas:
-        i, j = mapa_nos[origin_city], mapa_nos[destination_city]
-        matriz_adjacencia[i][j] = {'toll': toll, 'fuel': fuel, 'distance_km': distance_km}
-
-    return matriz_adjacencia, mapa_nos
+PATH_LIMIT = 100  # paths listed by main(); count_paths() still counts them all
 
 class BidirectionalAStar:
     def __init__(self, s_start, s_goal, heuristic_type, graph, weights):
-        self.s_start = s_start
-        self.s_goal = s_goal
+        self.s_start = graph.symbols[s_start]
+        self.s_goal = graph.symbols[s_goal]
         self.heuristic_type = heuristic_type
         self.graph = graph
         self.weights = weights
+        self.edge_cost = graph.weighted_cost(weights)
+
+        # Potentials from the landmarks and node coordinates available for these weights
+        bounds = lower_bounds(graph, weights)
+        self.potentials = bounds.bidirectional_potentials(self.s_start, self.s_goal) \
+            if bounds is not None else None
 
-        self.OPEN_fore = []
-        self.OPEN_back = []
+        self.OPEN_fore = IndexedHeap()  # one entry per node, lowered in place on a better g
+        self.OPEN_back = IndexedHeap()
         self.CLOSED_fore = set()
         self.CLOSED_back = set()
-        self.PARENT_fore = {}
-        self.PARENT_back = {}
         self.g_fore = {}
         self.g_back = {}
-        self.meeting_nodes = []
+        self.mu = math.inf  # optimal start-goal cost once the search is done
+
+        # Optimal-path DAG: node -> successors on some optimal path, and memoized path counts
+        self.successors = None
+        self.counts = None
 
     def init(self):
         self.g_fore[self.s_start] = 0.0
         self.g_back[self.s_goal] = 0.0
-        self.PARENT_fore[self.s_start] = []
-        self.PARENT_back[self.s_goal] = []
-
-        heapq.heappush(self.OPEN_fore, (self.f_value_fore(self.s_start), self.s_start))
-        heapq.heappush(self.OPEN_back, (self.f_value_back(self.s_goal), self.s_goal))
-
-    def searching(self):
+        if self.s_start == self.s_goal:
+            self.mu = 0.0
+
+        self.OPEN_fore.push(self.s_start, self.f_value_fore(self.s_start))
+        self.OPEN_back.push(self.s_goal, self.f_value_back(self.s_goal))
+
+    def searching(self, limit=None):
+        """Optimal paths as lists of names: all of them, or at most limit."""
+        paths = list(islice(self.iter_paths(), limit))
+        return paths, self.CLOSED_fore, self.CLOSED_back
+
+    def iter_paths(self):
+        """Yields every optimal path one at a time, without building the others."""
+        self.search()
+        if self.count_paths() == 0:
+            return
+        if self.s_start == self.s_goal:
+            yield self.graph.symbols.translate([self.s_start])
+            return
+
+        # Depth-first over the DAG, only into nodes that still lead to the goal
+        path = [self.s_start]
+        on_path = {self.s_start}
+        stack = [iter(self.successors[self.s_start])]
+        while stack:
+            s_n = next(stack[-1], None)
+            if s_n is None:
+                stack.pop()
+                on_path.discard(path.pop())
+            elif self.counts[s_n] and s_n not in on_path:
+                if s_n == self.s_goal:
+                    yield self.graph.symbols.translate(path + [s_n])
+                else:
+                    path.append(s_n)
+                    on_path.add(s_n)
+                    stack.append(iter(self.successors[s_n]))
+
+    def count_paths(self):
+        """Number of optimal paths, counted over the DAG without listing them."""
+        self.search()
+        if self.counts is None:
+            self.counts = {}
+            if self.s_start in self.successors:
+                self._count_from(self.s_start)
+        return self.counts.get(self.s_start, 0)
+
+    def _count_from(self, root):
+        # Iterative post-order, so long paths cannot hit the recursion limit; an edge
+        # back into the current branch (a zero-cost cycle) is not followed
+        on_branch = {root}
+        stack = [(root, iter(self.successors[root]))]
+        while stack:
+            s, successors = stack[-1]
+            s_n = next(successors, None)
+            if s_n is None:
+                stack.pop()
+                on_branch.discard(s)
+                self.counts[s] = 1 if s == self.s_goal else sum(
+                    self.counts.get(c, 0) for c in self.successors[s] if c not in on_branch)
+            elif s_n not in self.counts and s_n not in on_branch:
+                on_branch.add(s_n)
+                stack.append((s_n, iter(self.successors[s_n])))
+
+    def search(self):
+        """
+        Bidirectional search that stops only once the queue minima add up to more
+        than mu, so every node of every optimal path is settled by one side.
+        """
+        if self.successors is not None:
+            return
         self.init()
 
         while self.OPEN_fore and self.OPEN_back:
-            _, s_fore = heapq.heappop(self.OPEN_fore)
-            if s_fore in self.PARENT_back:
-                self.meeting_nodes.append(s_fore)
-
-            self.CLOSED_fore.add(s_fore)
-
-            for s_n in self.get_neighbors(s_fore):
-                new_cost = self.g_fore[s_fore] + self.cost(s_fore, s_n)
-                if s_n not in self.g_fore or new_cost < self.g_fore[s_n]:
-                    self.g_fore[s_n] = new_cost
-                    self.PARENT_fore[s_n] = [s_fore]
-                    heapq.heappush(self.OPEN_fore, (self.f_value_fore(s_n), s_n))
-                elif new_cost == self.g_fore[s_n]:
-                    self.PARENT_fore[s_n].append(s_fore)
-
-            _, s_back = heapq.heappop(self.OPEN_back)
-            if s_back in self.PARENT_fore:
-                self.meeting_nodes.append(s_back)
-
-            self.CLOSED_back.add(s_back)
-
-            for s_n in self.get_neighbors(s_back):
-                new_cost = self.g_back[s_back] + self.cost(s_back, s_n)
-                if s_n not in self.g_back or new_cost < self.g_back[s_n]:
-                    self.g_back[s_n] = new_cost
-                    self.PARENT_back[s_n] = [s_back]
-                    heapq.heappush(self.OPEN_back, (self.f_value_back(s_n), s_n))
-                elif new_cost == self.g_back[s_n]:
-                    self.PARENT_back[s_n].append(s_back)
-
-        if self.meeting_nodes:
-            return self.extract_all_paths(), self.CLOSED_fore, self.CLOSED_back
-        else:
-            return [], self.CLOSED_fore, self.CLOSED_back
-
-    def get_neighbors(self, s):
-        return self.graph.get(s, {}).keys()
-
-    def extract_all_paths(self):
-        all_paths = []
-        for node in self.meeting_nodes:
-            paths_fore = self.reconstruct_paths(self.PARENT_fore, node, direction='fore')
-            paths_back = self.reconstruct_paths(self.PARENT_back, node, direction='back')
-            for fore in paths_fore:
-                for back in paths_back:
-                    all_paths.append(fore + back[1:])
-        return all_paths
-
-    def reconstruct_paths(self, parents, node, direction):
-        if direction == 'fore':
-            if not parents[node]:
-                return [[node]]
-            paths = []
-            for parent in parents[node]:
-                for path in self.reconstruct_paths(parents, parent, direction):
-                    paths.append(path + [node])
-            return paths
-        else:
-            if not parents[node]:
-                return [[node]]
-            paths = []
-            for parent in parents[node]:
-                for path in self.reconstruct_paths(parents, parent, direction):
-                    paths.append([node] + path)
-            return paths
+            key_fore, key_back = self.OPEN_fore.peek()[0], self.OPEN_back.peek()[0]
+            if key_fore + key_back > self.mu and not _tied(key_fore + key_back, self.mu):
+                break
+            if (len(self.OPEN_fore), key_fore) <= (len(self.OPEN_back), key_back):
+                self.expand(self.OPEN_fore, self.CLOSED_fore, self.g_fore, self.g_back,
+                            self.graph.out_edges, self.f_value_fore)
+            else:
+                self.expand(self.OPEN_back, self.CLOSED_back, self.g_back, self.g_fore,
+                            self.graph.in_edges, self.f_value_back)
+
+        self.successors = self.optimal_dag()
+
+    def expand(self, open_set, closed, g, g_other, edges, f_value):
+        _, s = open_set.pop()
+        closed.add(s)
+        for s_n, edge_cost in edges(s, self.edge_cost):
+            new_cost = g[s] + edge_cost
+            if s_n not in g or new_cost < g[s_n]:
+                g[s_n] = new_cost
+                open_set.push(s_n, f_value(s_n))
+                if s_n in g_other:
+                    self.mu = min(self.mu, new_cost + g_other[s_n])
+
+    def optimal_dag(self):
+        """
+        Edges u -> v on some optimal path. A node settled forward has its exact
+        distance from the start; one settled only backward lies on an optimal path
+        only at distance mu - (its exact distance to the goal). Keeping the nodes
+        where both agree with mu, the optimal edges are those where the distance
+        from the start grows by exactly the edge cost.
+        """
+        if self.mu == math.inf:
+            return {}
+
+        from_start = {}
+        for s in self.CLOSED_fore | self.CLOSED_back:
+            fore = self.g_fore[s] if s in self.CLOSED_fore else self.mu - self.g_back[s]
+            back = self.g_back[s] if s in self.CLOSED_back else self.mu - self.g_fore[s]
+            if _tied(fore + back, self.mu):
+                from_start[s] = fore
+
+        successors = {}
+        for s, distance in from_start.items():
+            successors[s] = [s_n for s_n, edge_cost in self.graph.out_edges(s, self.edge_cost)
+                             if s_n in from_start and _tied(distance + edge_cost, from_start[s_n])]
+        return successors
 
     def f_value_fore(self, s):
         return self.g_fore.get(s, math.inf) + self.h(s, self.s_goal)
@@ -138,46 +168,31 @@ class BidirectionalAStar:
         return self.g_back.get(s, math.inf) + self.h(s, self.s_start)
 
     def h(self, s, goal):
-        return 0
+        if self.potentials is None:
+            return 0
+        h_fore, h_back = self.potentials
+        return h_fore[s] if goal == self.s_goal else h_back[s]
 
     def cost(self, s_start, s_goal):
-        edge = self.graph[s_start][s_goal]
-        return (self.weights['kms'] * edge['kms'] +
-                self.weights['litros'] * edge['litros'] +
-                self.weights['minutos'] * edge['minutos'])
-
-
-def load_graph_from_csv(filename):
-    df = pd.read_csv(filename, header=None, names=["start", "end", "kms", "litros", "minutos"])
-
-    # Replace non-numeric values with NaN, then fill with 0 or another value
-    df.replace(to_replace="toll", value=0, inplace=True)  # Replace "toll" with 0
-    df["kms"] = pd.to_numeric(df["kms"], errors="coerce").fillna(0)
-    df["litros"] = pd.to_numeric(df["litros"], errors="coerce").fillna(0)
-    df["minutos"] = pd.to_numeric(df["minutos"], errors="coerce").fillna(0)
+        return float(self.edge_cost[self.graph.edge_id(s_start, s_goal)])
 
-    graph = {}
-    for _, row in df.iterrows():
-        start, end = row["start"], row["end"]
-        edge_data = {"kms": row["kms"], "litros": row["litros"], "minutos": row["minutos"]}
 
-        if start not in graph:
-            graph[start] = {}
-        if end not in graph:
-            graph[end] = {}
+def _tied(a, b):
+    # Equal up to the rounding of summing the same costs in a different order
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
 
-        graph[start][end] = edge_data
-        graph[end][start] = edge_data
 
-    return graph
+def load_graph_from_csv(filename):
+    # A header row is skipped, any other non-numeric cost is an error; edges go both ways
+    return load_graph(filename, columns=("kms", "litros", "minutos"), symmetric=True)
 
 
 def main():
     choice = input("1. cidades.csv\n2. graph3.csv\n3. graph3_2.csv\n- ")
     if choice == "1":
         filename = "../cidades.csv"
-        matriz, mapa_nos = importar_grafo_csv(filename)
-        cidades = sorted(mapa_nos.keys())
+        graph = load_graph_from_csv(filename)
+        cidades = sorted(graph.symbols)
         print("\nCidades disponíveis:")
         for i, cidade in enumerate(cidades, 1):
             print(f"{i}. {cidade}")
@@ -206,17 +221,19 @@ def main():
         graph = load_graph_from_csv(filename)
         start_node = "A"
         goal_node = "B"
-    graph = load_graph_from_csv(filename)
 
     weights = {"kms": 1.0, "litros": 1.0, "minutos": 1.0}
 
     bastar = BidirectionalAStar(start_node, goal_node, "none", graph, weights)
-    paths, visited_fore, visited_back = bastar.searching()
+    paths, visited_fore, visited_back = bastar.searching(limit=PATH_LIMIT)
 
     if paths:
-        print("All Paths:")
+        total = bastar.count_paths()
+        print(f"All Paths ({total} optimal, cost {bastar.mu}):")
         for i, path in enumerate(paths):
             print(f"Path {i + 1}: {path}")
+        if total > len(paths):
+            print(f"... {total - len(paths)} more not listed")
     else:
         print("No path found between", start_node, "and", goal_node)
 
@@ -0,0 +1,81 @@
+"""
+All-pairs route costs and next hops for small dense graphs
+
+Floyd-Warshall over the dense weighted cost matrix, one vectorized min-plus
+relaxation per intermediate node. Afterwards any (start, goal) cost is a
+table lookup and its route is unrolled from the next-hop table.
+"""
+
+import numpy as np
+
+from graph.csr import weight_vector
+from graph.snapshot import PrecomputedSections, precompute_main
+
+MAX_NODES = 4096  # the tables take 12 * V^2 bytes
+
+
+class AllPairs(PrecomputedSections):
+    PREFIX = "allpairs"
+    ARRAYS = (("dist", "dist"), ("next", "next_hop"))
+
+    def __init__(self, dist, next_hop, weights, edge_cost):
+        super().__init__(weights, edge_cost)
+        self.dist = dist  # float64[V, V], inf when unreachable
+        self.next_hop = next_hop  # int32[V, V], node after u on the route u -> v, -1 when none
+
+    @classmethod
+    def build(cls, graph, weights=None):
+        n = graph.num_nodes
+        if n > MAX_NODES:
+            raise ValueError(f"{n} nodes is too many for all-pairs tables (at most {MAX_NODES})")
+        weights = weight_vector(graph, weights)
+        edge_cost = weights @ graph.costs
+
+        origins = np.repeat(np.arange(n), np.diff(graph.offsets))
+        targets = np.asarray(graph.targets, dtype=np.int64)
+        dist = np.full((n, n), np.inf)
+        dist[origins, targets] = edge_cost
+        next_hop = np.full((n, n), -1, dtype=np.int32)
+        next_hop[origins, targets] = targets
+        np.fill_diagonal(dist, 0.0)
+        next_hop[np.arange(n), np.arange(n)] = np.arange(n)
+
+        for k in range(n):
+            via = dist[:, k, None] + dist[None, k, :]
+            better = via < dist
+            dist = np.where(better, via, dist)
+            next_hop = np.where(better, next_hop[:, k, None], next_hop)
+
+        return cls(dist, next_hop, weights, edge_cost)
+
+    def summary(self, graph):
+        return f"all-pairs tables for {graph.num_nodes} nodes"
+
+    def cost(self, source, target):
+        return float(self.dist[source, target])
+
+    def path(self, source, target):
+        """Node indices of the cheapest route, or None when target is unreachable"""
+        if self.next_hop[source, target] < 0:
+            return None
+        path = [source]
+        while source != target:
+            source = int(self.next_hop[source, target])
+            path.append(source)
+        return path
+
+    def route(self, graph, source, target):
+        """(path, cost, {column: total along the path}), or (None, inf, None)"""
+        path = self.path(source, target)
+        if path is None:
+            return None, float('inf'), None
+        return path, self.cost(source, target), graph.path_costs(path)
+
+
+def main():
+    precompute_main("Precompute all-pairs tables into a graph snapshot",
+                    lambda graph, weights, args: AllPairs.build(graph, weights))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+LRU cache of route results in front of the search entry points
+
+Keys carry the graph version, the algorithm, both endpoints and the weight
+vector. Each graph has its own cache, and any cost update on it empties the
+cache, so a stale route is never served.
+"""
+
+import weakref
+from collections import OrderedDict
+
+from graph.csr import weight_vector
+
+ROUTE_CACHE_SIZE = 1024
+
+_caches = weakref.WeakKeyDictionary()  # graph -> RouteCache
+
+
+class RouteCache:
+    def __init__(self, maxsize=ROUTE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # least recently used first
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached result for key, or None. Results are shared: treat them as read-only."""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def invalidate(self, version=None, edges=None):
+        """Drops every entry; runs as a graph update subscriber"""
+        self.clear()
+        self.invalidations += 1
+
+    def counters(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def route_cache(graph):
+    """The RouteCache of graph, created on first use and emptied by every cost update"""
+    cache = _caches.get(graph)
+    if cache is None:
+        cache = _caches[graph] = RouteCache()
+        graph.subscribe(cache.invalidate)
+    return cache
+
+
+def route_key(graph, algorithm, start, goal, weights=None):
+    return (graph.version, algorithm, start, goal, tuple(weight_vector(graph, weights).tolist()))
@@ -0,0 +1,242 @@
+"""
+Contraction Hierarchies
+
+Nodes are contracted one at a time, least important first (twice the edge
+difference, plus contracted neighbours and level). Contracting v adds a
+shortcut u -> w for every u -> v -> w that no witness path avoiding v
+matches; witness searches are bounded in hops and settled nodes, and each
+contraction re-estimates the priorities of the neighbours it affects. A
+query then only follows edges towards more important nodes from both ends,
+and the shortcuts on the route found are unpacked through their middle nodes.
+
+Both phases are pure Python. On a 60 x 60 grid with random costs (3,600
+nodes, 14k edges) the build takes about 9 s and adds 24k shortcuts, and
+queries take about 1.6 ms (median); on a 100 x 100 grid (40k edges) it is
+32 s and 2.7 ms. Sub-millisecond queries on such graphs, and builds over
+millions of edges in practical time, are out of reach of this implementation.
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+from graph.csr import weight_vector
+from graph.heap import IndexedHeap
+from graph.snapshot import PrecomputedSections, precompute_main
+
+WITNESS_SETTLE_LIMIT = 64
+WITNESS_HOP_LIMIT = 5
+# Cheaper witness searches for re-estimating a neighbour's shortcuts after each contraction
+SIMULATION_SETTLE_LIMIT = 16
+SIMULATION_HOP_LIMIT = 2
+
+
+class ContractionHierarchy(PrecomputedSections):
+    PREFIX = "ch"
+    ARRAYS = (("rank", "rank"),
+              ("up_offsets", "up_offsets"), ("up_targets", "up_targets"),
+              ("up_cost", "up_cost"), ("up_middle", "up_middle"),
+              ("down_offsets", "down_offsets"), ("down_origins", "down_origins"),
+              ("down_cost", "down_cost"), ("down_middle", "down_middle"))
+
+    def __init__(self, rank, up_offsets, up_targets, up_cost, up_middle,
+                 down_offsets, down_origins, down_cost, down_middle, weights, edge_cost):
+        super().__init__(weights, edge_cost)
+        self.rank = rank  # int64[V], contraction order
+        # Edges to more important nodes as CSR (offsets, nodes, cost, middle node or -1):
+        # up holds u -> w under u, down holds x -> v under v
+        self.up_offsets, self.up_targets, self.up_cost, self.up_middle = \
+            up_offsets, up_targets, up_cost, up_middle
+        self.down_offsets, self.down_origins, self.down_cost, self.down_middle = \
+            down_offsets, down_origins, down_cost, down_middle
+        # Per-node edge lists and the shortcut middles as Python objects, built on the
+        # first query: queries then skip the array slicing on every settled node
+        self._up = self._down = self._middles = None
+
+    @classmethod
+    def build(cls, graph, weights=None, witness_limit=WITNESS_SETTLE_LIMIT, hop_limit=WITNESS_HOP_LIMIT):
+        weights = weight_vector(graph, weights)
+        edge_cost = weights @ graph.costs
+        n = graph.num_nodes
+
+        # Edges between uncontracted nodes: node -> {neighbour: (cost, middle node)}
+        out_adj = [{} for _ in range(n)]
+        in_adj = [{} for _ in range(n)]
+        for u in range(n):
+            for w, cost in graph.out_edges(u, edge_cost):
+                if w != u:
+                    out_adj[u][w] = in_adj[w][u] = (cost, -1)
+
+        contracted_neighbours = [0] * n
+        level = [0] * n  # 1 + highest level among the contracted neighbours
+        simulated = [0] * n  # shortcuts the last simulated contraction of each node needed
+        up_edges, down_edges = [None] * n, [None] * n
+        rank = np.empty(n, dtype=np.int64)
+
+        def shortcuts_for(v, witness_limit=witness_limit, hop_limit=hop_limit):
+            shortcuts = []
+            for u, (cost_uv, _) in in_adj[v].items():
+                targets = {w: cost_uv + cost for w, (cost, _) in out_adj[v].items() if w != u}
+                if not targets:
+                    continue
+                reach = _witness_costs(out_adj, u, v, targets, witness_limit, hop_limit)
+                for w, (cost_vw, _) in out_adj[v].items():
+                    if w != u and reach.get(w, math.inf) > cost_uv + cost_vw:
+                        shortcuts.append((u, w, cost_uv + cost_vw))
+            return shortcuts
+
+        def priority(v):
+            # Edge difference, weighted up, then spread over the graph and keep it shallow
+            return (2 * (simulated[v] - len(in_adj[v]) - len(out_adj[v]))
+                    + contracted_neighbours[v] + level[v])
+
+        queue = IndexedHeap()
+        for v in range(n):
+            simulated[v] = len(shortcuts_for(v, SIMULATION_SETTLE_LIMIT, SIMULATION_HOP_LIMIT))
+            queue.push(v, priority(v))
+
+        order = 0
+        while queue:
+            _, v = queue.pop()
+            # Lazy update: the shortcut count may have grown since v was last simulated
+            shortcuts = shortcuts_for(v)
+            simulated[v] = len(shortcuts)
+            current = priority(v)
+            if queue and current > queue.peek()[0]:
+                queue.push(v, current)
+                continue
+
+            rank[v] = order
+            order += 1
+            up_edges[v] = out_adj[v]
+            down_edges[v] = in_adj[v]
+            for u in in_adj[v]:
+                del out_adj[u][v]
+            for w in out_adj[v]:
+                del in_adj[w][v]
+            for u, w, cost in shortcuts:
+                if cost < out_adj[u].get(w, (math.inf,))[0]:
+                    out_adj[u][w] = in_adj[w][u] = (cost, v)
+
+            # Contracting v changes only its neighbours' priorities: re-estimate them now,
+            # so a neighbour that now needs many shortcuts falls back in the order
+            for u in set(in_adj[v]) | set(out_adj[v]):
+                contracted_neighbours[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+                simulated[u] = len(shortcuts_for(u, SIMULATION_SETTLE_LIMIT, SIMULATION_HOP_LIMIT))
+                queue.update(u, priority(u))
+
+        return cls(rank, *_to_csr(up_edges), *_to_csr(down_edges), weights, edge_cost)
+
+    def summary(self, graph):
+        return f"contraction hierarchy with {self.num_shortcuts} shortcuts"
+
+    @property
+    def num_shortcuts(self):
+        return int((self.up_middle >= 0).sum() + (self.down_middle >= 0).sum())
+
+    def up_edges(self, u):
+        """(neighbour, cost) pairs of u -> w towards more important nodes"""
+        if self._up is None:
+            self._up = _edge_lists(self.up_offsets, self.up_targets, self.up_cost)
+        return self._up[u]
+
+    def down_edges(self, v):
+        """(origin, cost) pairs of x -> v from more important nodes, for the backward search"""
+        if self._down is None:
+            self._down = _edge_lists(self.down_offsets, self.down_origins, self.down_cost)
+        return self._down[v]
+
+    def middle(self, u, w):
+        """Node a shortcut u -> w skips, or -1 for an original edge"""
+        if self._middles is None:
+            self._middles = {}
+            for offsets, nodes, middles, up in ((self.up_offsets, self.up_targets, self.up_middle, True),
+                                                (self.down_offsets, self.down_origins, self.down_middle, False)):
+                owners = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+                shortcut = middles >= 0
+                pairs = zip(owners[shortcut].tolist(), nodes[shortcut].tolist())
+                self._middles.update(((a, b) if up else (b, a), m)
+                                     for (a, b), m in zip(pairs, middles[shortcut].tolist()))
+        return self._middles.get((u, w), -1)
+
+    def unpack(self, path):
+        """Path over hierarchy edges to the path over original edges"""
+        unpacked = [path[0]]
+        stack = [(u, w) for u, w in zip(path[-2::-1], path[:0:-1])]
+        while stack:
+            u, w = stack.pop()
+            m = self.middle(u, w)
+            if m < 0:
+                unpacked.append(w)
+            else:
+                stack.append((m, w))
+                stack.append((u, m))
+        return unpacked
+
+
+def _witness_costs(out_adj, source, skip, targets, limit, hop_limit):
+    """
+    Costs from source avoiding skip, over paths of at most hop_limit edges. The
+    search settles at most limit nodes and stops early once every target
+    (node -> cost via skip) is settled or out of reach of its cost.
+    """
+    max_cost = max(targets.values())
+    remaining = len(targets)
+    dist = {source: 0.0}
+    hops = {source: 0}
+    # Millions of these tiny searches run per build: a plain heapq with stale
+    # entries skipped is much cheaper here than IndexedHeap's decrease-key
+    heap = [(0.0, source)]
+    while heap and limit > 0:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > max_cost:
+            break
+        if u in targets:
+            remaining -= 1
+            if not remaining:
+                break
+        limit -= 1
+        if hops[u] == hop_limit:
+            continue
+        for w, (cost, _) in out_adj[u].items():
+            nd = d + cost
+            if w != skip and nd < dist.get(w, math.inf):
+                dist[w] = nd
+                hops[w] = hops[u] + 1
+                heapq.heappush(heap, (nd, w))
+    return dist
+
+
+def _edge_lists(offsets, nodes, cost):
+    """CSR arrays to one list of (node, cost) pairs per node"""
+    pairs = list(zip(nodes.tolist(), cost.tolist()))
+    bounds = offsets.tolist()
+    return [pairs[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+
+
+def _to_csr(adjacency):
+    """Per-node {neighbour: (cost, middle)} dicts to CSR arrays sorted by neighbour"""
+    offsets = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    np.cumsum([len(edges) for edges in adjacency], out=offsets[1:])
+    nodes = np.empty(offsets[-1], dtype=np.int64)
+    cost = np.empty(offsets[-1])
+    middle = np.empty(offsets[-1], dtype=np.int64)
+    for v, edges in enumerate(adjacency):
+        lo = offsets[v]
+        for i, w in enumerate(sorted(edges), lo):
+            nodes[i] = w
+            cost[i], middle[i] = edges[w]
+    return offsets, nodes, cost, middle
+
+
+def main():
+    precompute_main("Precompute a contraction hierarchy into a graph snapshot",
+                    lambda graph, weights, args: ContractionHierarchy.build(graph, weights))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Compressed-sparse-row road graph shared by the search engines
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from graph.symbols import SymbolTable
+
+COST_COLUMNS = ("toll", "fuel", "distance_km")
+CHANGE_LOG_SIZE = 64
+WEIGHTED_CACHE_SIZE = 8
+
+
+class CSRGraph:
+    def __init__(self, offsets, targets, costs, symbols, columns=COST_COLUMNS):
+        self.offsets = offsets  # int64[V + 1], out-edges of u are offsets[u]:offsets[u + 1]
+        self.targets = targets  # int32[E], sorted by (origin, destination)
+        self.costs = costs  # float64[len(columns), E], one row per cost column
+        self.columns = tuple(columns)
+        self.symbols = symbols if isinstance(symbols, SymbolTable) else SymbolTable(symbols)
+        self.sections = {}  # extra named arrays persisted with the graph in snapshots
+        self.symmetric = False  # loaded with every edge in both directions
+        self.coordinates = None  # float64[V, 2] latitude/longitude, NaN where unknown
+
+        self.version = 0  # bumped by every applied cost update
+        self._changes = []  # (version, edge ids) of the last CHANGE_LOG_SIZE updates
+        self._listeners = []
+        self._edge_keys = None
+        self._transpose = None
+        self._weighted = OrderedDict()  # weight tuple -> float64[E], least recently used first
+
+    @classmethod
+    def from_edges(cls, src, dst, costs, symbols, columns=COST_COLUMNS):
+        """Builds the CSR arrays from parallel edge arrays (last repeated edge wins)"""
+        num_nodes = len(symbols)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        costs = np.asarray(costs, dtype=np.float64).reshape(len(columns), len(src))
+
+        # np.unique over the reversed keys keeps the last occurrence and sorts by (src, dst)
+        key = src * num_nodes + dst
+        _, first = np.unique(key[::-1], return_index=True)
+        keep = len(key) - 1 - first
+
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src[keep], minlength=num_nodes), out=offsets[1:])
+        index_type = np.int32 if num_nodes < 2 ** 31 else np.int64
+
+        return cls(offsets, dst[keep].astype(index_type), np.ascontiguousarray(costs[:, keep]),
+                   symbols, columns)
+
+    @property
+    def num_nodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    def column(self, name):
+        return self.costs[self.columns.index(name)]
+
+    def combined_cost(self):
+        """Per-edge sum of every cost column"""
+        return self.weighted_cost(None)
+
+    def weighted_cost(self, weights):
+        """
+        Per-edge sum of the cost columns scaled by a {column: weight} dict (None:
+        every weight is 1). One array per distinct weighting is kept in a small
+        LRU and patched by cost updates, so it is shared: do not modify it.
+        """
+        key = tuple(weight_vector(self, weights).tolist())
+        cost = self._weighted.get(key)
+        if cost is None:
+            cost = np.asarray(key) @ self.costs
+            self._weighted[key] = cost
+            if len(self._weighted) > WEIGHTED_CACHE_SIZE:
+                self._weighted.popitem(last=False)
+        else:
+            self._weighted.move_to_end(key)
+        return cost
+
+    def out_edges(self, u, edge_cost):
+        """(neighbour, cost) pairs of the real out-edges of u"""
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[lo:hi].tolist(), edge_cost[lo:hi].tolist())
+
+    def transpose(self):
+        """Incoming-edge CSR as (offsets, origins, edge ids), built once"""
+        if self._transpose is None:
+            order = np.argsort(self.targets, kind="stable")
+            origins = np.repeat(np.arange(self.num_nodes, dtype=self.targets.dtype), np.diff(self.offsets))
+            offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=self.num_nodes), out=offsets[1:])
+            self._transpose = (offsets, origins[order], order)
+        return self._transpose
+
+    def in_edges(self, v, edge_cost):
+        """(origin, cost) pairs of the real in-edges of v"""
+        offsets, origins, edges = self.transpose()
+        lo, hi = offsets[v], offsets[v + 1]
+        return zip(origins[lo:hi].tolist(), edge_cost[edges[lo:hi]].tolist())
+
+    def neighbors(self, u):
+        return self.targets[self.offsets[u]:self.offsets[u + 1]].tolist()
+
+    def edge_id(self, u, v):
+        """Position of the edge u -> v in the edge arrays, or -1 when it does not exist"""
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        pos = lo + np.searchsorted(self.targets[lo:hi], v)
+        if pos < hi and self.targets[pos] == v:
+            return int(pos)
+        return -1
+
+    def edge(self, u, v):
+        e = self.edge_id(u, v)
+        if e < 0:
+            return None
+        return {name: float(self.costs[i, e]) for i, name in enumerate(self.columns)}
+
+    def edge_ids(self, origins, destinations):
+        """Vectorized edge_id over parallel arrays of node indices"""
+        if self._edge_keys is None:
+            # Edges are sorted by (origin, destination), so origin * V + destination is sorted too
+            origins_of_edges = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets))
+            self._edge_keys = origins_of_edges * self.num_nodes + self.targets
+        keys = (np.asarray(origins, dtype=np.int64) * self.num_nodes
+                + np.asarray(destinations, dtype=np.int64))
+        pos = np.searchsorted(self._edge_keys, keys)
+        found = pos < self.num_edges
+        found[found] = self._edge_keys[pos[found]] == keys[found]
+        return np.where(found, pos, -1)
+
+    def path_edges(self, path):
+        path = np.asarray(path, dtype=np.int64)
+        return self.edge_ids(path[:-1], path[1:])
+
+    def update_costs(self, updates):
+        """
+        Applies a batch of (origin, destination, <one value per cost column>) rows
+        in place, without rebuilding the CSR arrays. Origins and destinations are
+        node names. Only edges whose costs really change are recorded; when any
+        do, the version is bumped and every subscriber is notified.
+        Returns the ids of the changed edges.
+        """
+        updates = list(updates)
+        origins = self.symbols.indices([row[0] for row in updates])
+        destinations = self.symbols.indices([row[1] for row in updates])
+        values = np.array([row[2:] for row in updates], dtype=np.float64).reshape(-1, len(self.columns)).T
+        return self.update_edge_costs(origins, destinations, values)
+
+    def update_edge_costs(self, origins, destinations, values):
+        """update_costs over index arrays and a [len(columns), n] value array"""
+        if self.symmetric:
+            origins, destinations = (np.concatenate([origins, destinations]),
+                                     np.concatenate([destinations, origins]))
+            values = np.concatenate([values, values], axis=1)
+
+        edges = self.edge_ids(origins, destinations)
+        if (edges < 0).any():
+            missing = [(self.symbols.name(u), self.symbols.name(v))
+                       for u, v in zip(origins[edges < 0], destinations[edges < 0])]
+            raise KeyError(f"Edges not in the graph: {missing[:5]}")
+
+        # Keep the last value of an edge repeated within the batch
+        _, last = np.unique(edges[::-1], return_index=True)
+        last = len(edges) - 1 - last
+        edges, values = edges[last], values[:, last]
+
+        changed = (self.costs[:, edges] != values).any(axis=0)
+        edges, values = edges[changed], values[:, changed]
+        if len(edges) == 0:
+            return edges
+
+        self.costs[:, edges] = values
+        for key, cost in self._weighted.items():
+            cost[edges] = np.asarray(key) @ values
+
+        self.version += 1
+        self._changes.append((self.version, edges))
+        del self._changes[:-CHANGE_LOG_SIZE]
+        for callback in self._listeners:
+            callback(self.version, edges)
+        return edges
+
+    def subscribe(self, callback):
+        """callback(version, edge_ids) runs after every cost update that changed something"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        self._listeners.remove(callback)
+
+    def changes_since(self, version):
+        """
+        Ids of the edges changed after version, or None when the change log no
+        longer reaches back that far (dependants must then rebuild everything).
+        """
+        if version == self.version:
+            return np.empty(0, dtype=np.int64)
+        if not self._changes or self._changes[0][0] > version + 1:
+            return None
+        return np.unique(np.concatenate([edges for v, edges in self._changes if v > version]))
+
+    def path_costs(self, path):
+        """Totals of every cost column along a path of node indices"""
+        totals = self.costs[:, self.path_edges(path)].sum(axis=1)
+        return dict(zip(self.columns, totals.tolist()))
+
+
+def weight_vector(graph, weights=None):
+    """{column: weight} as an array aligned with graph.columns (None: every weight is 1)"""
+    if weights is None:
+        return np.ones(len(graph.columns))
+    if isinstance(weights, np.ndarray):
+        return weights  # already aligned
+    return np.array([float(weights[name]) for name in graph.columns])
@@ -0,0 +1,95 @@
+"""
+Node coordinates and great-circle lower bounds
+
+The cheapest cost per great-circle km over every edge is a valid rate for any
+path: each edge costs at least rate * its great-circle length, and the
+great-circle lengths of a path add up to at least the one from its first to
+its last node. rate * great_circle(v, t) therefore never overestimates d(v, t).
+That needs every node located: an edge to or from an unlocated node cannot be
+calibrated, yet optimal paths may still run through it.
+"""
+
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from graph.csr import weight_vector
+
+EARTH_RADIUS_KM = 6371.0
+
+# graph -> (graph version, weights, cost per km), recalibrated once per version
+_rates = weakref.WeakKeyDictionary()
+
+
+def default_coordinates_path(csv_path):
+    base, _ = os.path.splitext(csv_path)
+    return base + ".coords.csv"
+
+
+def load_coordinates(graph, path):
+    """
+    float64[V, 2] latitude/longitude in degrees from a "name,latitude,longitude"
+    file (header row included), NaN for nodes the file does not list.
+    """
+    table = pd.read_csv(path, dtype={0: object}, encoding="utf-8")
+    coordinates = np.full((graph.num_nodes, 2), np.nan)
+    known = table.iloc[:, 0].isin(graph.symbols.names).to_numpy()
+    rows = graph.symbols.indices(table.iloc[:, 0][known].tolist())
+    coordinates[rows] = table.iloc[:, 1:3][known].to_numpy(np.float64)
+    return coordinates
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, vectorized over NumPy arrays of degrees"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GeoBounds:
+    def __init__(self, coordinates, rate):
+        self.coordinates = coordinates  # float64[V, 2] latitude/longitude in degrees
+        self.rate = rate  # lowest edge cost per great-circle km
+
+    @classmethod
+    def from_graph(cls, graph, weights=None):
+        """Bounds for the weighted edge cost, or None unless every node has coordinates"""
+        if graph.coordinates is None or np.isnan(graph.coordinates).any():
+            return None
+        weights = weight_vector(graph, weights)
+
+        cached = _rates.get(graph)
+        if cached is not None and cached[0] == graph.version and np.array_equal(cached[1], weights):
+            return cls(graph.coordinates, cached[2])
+
+        rate = calibrate_rate(graph, graph.weighted_cost(weights))
+        _rates[graph] = (graph.version, weights, rate)
+        return cls(graph.coordinates, rate)
+
+    def bound_to(self, target):
+        """v -> admissible lower bound on d(v, target)"""
+        lat, lon = self.coordinates[target]
+
+        def bound(v):
+            return self.rate * float(haversine_km(self.coordinates[v, 0], self.coordinates[v, 1], lat, lon))
+        return bound
+
+    def bound_from(self, source):
+        # Great-circle distance is symmetric
+        return self.bound_to(source)
+
+
+def calibrate_rate(graph, edge_cost):
+    """Minimum of edge_cost / great-circle km over the edges (every node located)"""
+    offsets, targets = np.asarray(graph.offsets), np.asarray(graph.targets)
+    origins = np.repeat(np.arange(graph.num_nodes), np.diff(offsets))
+    a, b = graph.coordinates[origins], graph.coordinates[targets]
+    km = haversine_km(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+    usable = km > 0
+    if not usable.any():
+        return 0.0
+    return max(float(np.min(edge_cost[usable] / km[usable])), 0.0)
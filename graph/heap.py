@@ -0,0 +1,122 @@
+"""
+Addressable binary min-heap shared by the search engines
+
+Every item is queued at most once: pushing an item that is already queued
+lowers its priority in place (decrease-key) instead of adding a second entry,
+so the heap holds at most one entry per node and nothing popped is ever stale.
+"""
+
+
+class IndexedHeap:
+    """Min-heap of (priority, item) entries with a position map for decrease-key"""
+
+    def __init__(self):
+        self._heap = []  # (priority, item), equal priorities ordered by item
+        self._pos = {}  # item -> index of its entry in _heap
+
+        self.pushes = 0  # new entries
+        self.decreases = 0  # priorities lowered in place: each one a duplicate entry saved
+        self.ignored = 0  # pushes that would not have lowered the priority
+        self.pops = 0
+        self.max_size = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def __contains__(self, item):
+        return item in self._pos
+
+    def push(self, item, priority):
+        """
+        Queues item, or lowers its priority when it is already queued.
+        Returns False when the item was queued with a priority at least as low.
+        """
+        i = self._pos.get(item)
+        if i is None:
+            self._heap.append((priority, item))
+            self._pos[item] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            self.pushes += 1
+            self.max_size = max(self.max_size, len(self._heap))
+            return True
+        if not (priority, item) < self._heap[i]:
+            self.ignored += 1
+            return False
+        self._heap[i] = (priority, item)
+        self._sift_up(i)
+        self.decreases += 1
+        return True
+
+    def update(self, item, priority):
+        """Queues item, or moves it to priority whether that is lower or higher"""
+        i = self._pos.get(item)
+        if i is None:
+            self.push(item, priority)
+            return
+        old = self._heap[i]
+        self._heap[i] = (priority, item)
+        if self._heap[i] < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def pop(self):
+        """Removes and returns the (priority, item) entry with the lowest priority"""
+        entry = self._heap[0]
+        last = self._heap.pop()
+        del self._pos[entry[1]]
+        if self._heap:
+            self._heap[0] = last
+            self._pos[last[1]] = 0
+            self._sift_down(0)
+        self.pops += 1
+        return entry
+
+    def peek(self):
+        return self._heap[0]
+
+    def priority(self, item):
+        return self._heap[self._pos[item]][0]
+
+    def counters(self):
+        return {
+            "pushes": self.pushes,
+            "decreases": self.decreases,
+            "ignored": self.ignored,
+            "pops": self.pops,
+            "max_size": self.max_size,
+        }
+
+    def _sift_up(self, i):
+        heap, pos = self._heap, self._pos
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not entry < heap[parent]:
+                break
+            heap[i] = heap[parent]
+            pos[heap[i][1]] = i
+            i = parent
+        heap[i] = entry
+        pos[entry[1]] = i
+
+    def _sift_down(self, i):
+        heap, pos = self._heap, self._pos
+        size = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[i] = heap[child]
+            pos[heap[i][1]] = i
+            i = child
+        heap[i] = entry
+        pos[entry[1]] = i
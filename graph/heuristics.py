@@ -0,0 +1,67 @@
+"""
+Lower bounds for the A* engines, combining every estimator the graph supports
+"""
+
+import math
+
+from graph.geo import GeoBounds
+from graph.landmarks import Landmarks
+
+
+class NodeBounds(dict):
+    """node -> bound, each computed on first lookup and kept for the rest of the query"""
+
+    def __init__(self, bound):
+        super().__init__()
+        self.bound = bound
+
+    def __missing__(self, node):
+        value = self[node] = self.bound(node)
+        return value
+
+
+class CombinedBounds:
+    """The largest of several admissible bounds, which is still admissible"""
+
+    def __init__(self, estimators):
+        self.estimators = estimators
+
+    def lower_bounds_to(self, target):
+        """NodeBounds on d(v, target) (inf: target unreachable from v)"""
+        return NodeBounds(self._largest([e.bound_to(target) for e in self.estimators]))
+
+    def lower_bounds_from(self, source):
+        """NodeBounds on d(source, v)"""
+        return NodeBounds(self._largest([e.bound_from(source) for e in self.estimators]))
+
+    def bidirectional_potentials(self, source, target):
+        """
+        Forward and backward heuristics for bidirectional A*: the average of both
+        bounds keeps the two searches consistent with each other.
+        """
+        to_target = self._largest([e.bound_to(target) for e in self.estimators])
+        from_source = self._largest([e.bound_from(source) for e in self.estimators])
+
+        def potential(v):
+            # Nodes off every source-target path: no bound is needed to stay correct
+            ahead, behind = to_target(v), from_source(v)
+            return ((0.0 if math.isinf(ahead) else ahead) - (0.0 if math.isinf(behind) else behind)) / 2
+
+        forward = NodeBounds(potential)
+        return forward, NodeBounds(lambda v: -forward[v])
+
+    @staticmethod
+    def _largest(bounds):
+        if len(bounds) == 1:
+            return bounds[0]
+        return lambda v: max(bound(v) for bound in bounds)
+
+
+def lower_bounds(graph, weights=None):
+    """
+    CombinedBounds over the landmarks and coordinates available for this
+    weighting of the cost columns, or None when there are neither.
+    """
+    estimators = [e for e in (Landmarks.from_graph(graph, weights), GeoBounds.from_graph(graph, weights))
+                  if e is not None]
+    return CombinedBounds(estimators) if estimators else None
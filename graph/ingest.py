@@ -0,0 +1,159 @@
+"""
+Streaming CSV ingestion into a CSRGraph
+
+The edge list is read in bounded chunks, the cost columns are parsed as
+floats per chunk (an empty or non-numeric cost is an error) and the rows are appended straight into growable NumPy
+buffers, so no full DataFrame or per-edge dict is ever alive.
+"""
+
+import csv
+import time
+
+import numpy as np
+import pandas as pd
+
+from graph.csr import COST_COLUMNS, CSRGraph
+
+CHUNK_ROWS = 1 << 16
+
+
+class IngestStats:
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+
+
+class _GrowableArray:
+    """Append-only NumPy buffer with amortised doubling, width rows wide"""
+
+    def __init__(self, dtype, width=1, capacity=1024):
+        self.data = np.empty((width, capacity), dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.atleast_2d(values)
+        needed = self.size + values.shape[1]
+        if needed > self.data.shape[1]:
+            grown = np.empty((self.data.shape[0], max(needed, 2 * self.data.shape[1])),
+                             dtype=self.data.dtype)
+            grown[:, :self.size] = self.data[:, :self.size]
+            self.data = grown
+        self.data[:, self.size:needed] = values
+        self.size = needed
+
+    def view(self):
+        return self.data[:, :self.size]
+
+
+def load_csv(path, columns=COST_COLUMNS, header=None, symmetric=False,
+             chunk_rows=CHUNK_ROWS, progress=None):
+    """
+    Reads an "origin,destination,<columns...>" edge list into a CSRGraph.
+    header=None skips the first row only when its cost fields are not numeric;
+    symmetric=True also adds every edge in the opposite direction. progress, if
+    given, is called with the running IngestStats after every chunk; the final
+    stats are kept on graph.ingest_stats. Raises ValueError, naming the row, on
+    a cost field that is empty or not a number.
+    """
+    index = {}
+    src = _GrowableArray(np.int64)
+    dst = _GrowableArray(np.int64)
+    costs = _GrowableArray(np.float64, width=len(columns))
+    stats = IngestStats()
+    started = time.perf_counter()
+
+    for endpoints, values in _read_chunks(path, columns, header, chunk_rows):
+        codes, uniques = pd.factorize(endpoints)
+        ids = np.fromiter((index.setdefault(name, len(index)) for name in uniques),
+                          dtype=np.int64, count=len(uniques))[codes]
+
+        if symmetric:
+            # Each edge followed by its reverse, so a repeated pair keeps the last row
+            src.extend(ids)
+            dst.extend(ids.reshape(-1, 2)[:, ::-1].ravel())
+            costs.extend(np.repeat(values, 2, axis=1))
+        else:
+            src.extend(ids[0::2])
+            dst.extend(ids[1::2])
+            costs.extend(values)
+
+        stats.rows += values.shape[1]
+        stats.chunks += 1
+        stats.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(stats)
+
+    graph = CSRGraph.from_edges(src.view()[0], dst.view()[0], costs.view(), list(index), columns)
+    stats.seconds = time.perf_counter() - started
+    graph.symmetric = symmetric
+    graph.ingest_stats = stats
+    return graph
+
+
+def apply_delta_csv(graph, path, header=None, chunk_rows=CHUNK_ROWS):
+    """
+    Applies a delta file in the same edge-list format to graph in place, as a
+    single update (one version bump). Returns the ids of the changed edges.
+    """
+    origins, destinations, values = [], [], []
+    for endpoints, chunk_values in _read_chunks(path, graph.columns, header, chunk_rows):
+        ids = graph.symbols.indices(endpoints)
+        origins.append(ids[0::2])
+        destinations.append(ids[1::2])
+        values.append(chunk_values)
+
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    return graph.update_edge_costs(np.concatenate(origins), np.concatenate(destinations),
+                                   np.concatenate(values, axis=1))
+
+
+def _read_chunks(path, columns, header, chunk_rows):
+    """Yields (interleaved origin/destination names, float64[len(columns), rows]) per chunk"""
+    width = 2 + len(columns)
+    if header is None:
+        header = _has_header(path)
+
+    try:
+        chunks = pd.read_csv(path, header=None, skiprows=1 if header else 0,
+                             names=list(range(width)), usecols=list(range(width)),
+                             dtype={0: object, 1: object}, keep_default_na=False,
+                             encoding="utf-8", chunksize=chunk_rows)
+    except pd.errors.EmptyDataError:
+        return
+
+    for chunk in chunks:
+        # Origin and destination interleaved so new names get indices in file order
+        endpoints = np.empty(2 * len(chunk), dtype=object)
+        endpoints[0::2] = chunk[0].to_numpy(dtype=object)
+        endpoints[1::2] = chunk[1].to_numpy(dtype=object)
+
+        # Already float unless the chunk holds an empty or junk cell, which comes out as NaN
+        values = np.vstack([pd.to_numeric(chunk[2 + i], errors="coerce").to_numpy(np.float64)
+                            for i in range(len(columns))])
+        bad = np.argwhere(np.isnan(values))
+        if len(bad):
+            i, row = bad[np.argmin(bad[:, 1])]
+            line = int(chunk.index[row]) + (2 if header else 1)
+            raise ValueError(f"{path}, row {line}: {columns[i]} is {chunk.iat[row, 2 + i]!r}, expected a number")
+        yield endpoints, values
+
+
+def _has_header(path):
+    with open(path, newline='', encoding='utf-8') as ficheiro:
+        first = next(csv.reader(ficheiro), None)
+    if not first:
+        return False
+    try:
+        [float(x) for x in first[2:]]
+    except ValueError:
+        return True
+    return False
@@ -0,0 +1,84 @@
+"""
+K shortest loopless paths (Yen), produced lazily in cost order
+
+One reverse Dijkstra from the target gives exact costs-to-go. Banning nodes
+and edges only makes routes longer, so those costs stay an admissible and
+consistent A* heuristic for every spur search, which then goes nearly
+straight to the target instead of exploring the graph again.
+"""
+
+import math
+
+from graph.heap import IndexedHeap
+from graph.search import dijkstra
+
+
+def k_shortest_paths(graph, source, target, edge_cost, k=None, max_cost=None):
+    """
+    Yields (path of node indices, cost) for the cheapest simple paths from
+    source to target, cheapest first: at most k of them (None: no limit) and
+    none costing more than max_cost (None: no ceiling).
+    """
+    max_cost = math.inf if max_cost is None else max_cost
+    to_target = dijkstra(graph, target, edge_cost, reverse=True).tolist()
+    if to_target[source] > max_cost:
+        return
+
+    found = []
+    candidates = IndexedHeap()  # keyed by the path itself, so a repeated candidate is queued once
+    path, cost = _spur_search(graph, source, target, edge_cost, to_target, set(), set(), max_cost)
+
+    while path is not None:
+        yield path, cost
+        found.append(path)
+        if k is not None and len(found) >= k:
+            return
+
+        # Deviate from the last path at every node: the root up to the spur node is
+        # kept, and the next edge of every found path sharing that root is banned
+        root_cost = 0.0
+        for i in range(len(path) - 1):
+            root = path[:i + 1]
+            banned_edges = {graph.edge_id(p[i], p[i + 1]) for p in found if p[:i + 1] == root}
+            spur, spur_cost = _spur_search(graph, path[i], target, edge_cost, to_target,
+                                           set(root[:-1]), banned_edges, max_cost - root_cost)
+            if spur is not None:
+                candidates.push(tuple(root[:-1] + spur), root_cost + spur_cost)
+            root_cost += float(edge_cost[graph.edge_id(path[i], path[i + 1])])
+
+        if not candidates:
+            return
+        cost, path = candidates.pop()
+        path = list(path)
+
+
+def _spur_search(graph, source, target, edge_cost, to_target, banned_nodes, banned_edges, max_cost):
+    """A* from source to target avoiding the banned nodes and edge ids, or (None, inf)"""
+    offsets = graph.offsets
+    g = {source: 0.0}
+    parents = {source: None}
+    heap = IndexedHeap()
+    heap.push(source, to_target[source])
+
+    while heap:
+        f, u = heap.pop()
+        if f > max_cost:
+            break
+        if u == target:
+            path = []
+            while u is not None:
+                path.append(u)
+                u = parents[u]
+            return path[::-1], g[target]
+
+        lo, hi = int(offsets[u]), int(offsets[u + 1])
+        for e, (v, cost) in enumerate(zip(graph.targets[lo:hi].tolist(), edge_cost[lo:hi].tolist()), lo):
+            if v in banned_nodes or e in banned_edges or to_target[v] == math.inf:
+                continue
+            nd = g[u] + cost
+            if nd < g.get(v, math.inf):
+                g[v] = nd
+                parents[v] = u
+                heap.push(v, nd + to_target[v])
+
+    return None, math.inf
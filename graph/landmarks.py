@@ -0,0 +1,88 @@
+"""
+Landmark (ALT) lower bounds for A* and bidirectional A*
+
+K landmarks are picked far apart and one-to-all searches are run from and to
+each of them. The triangle inequality then bounds the remaining cost:
+d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L).
+"""
+
+import numpy as np
+
+from graph.csr import weight_vector
+from graph.search import dijkstra
+from graph.snapshot import PrecomputedSections, precompute_main
+
+
+class Landmarks(PrecomputedSections):
+    PREFIX = "landmark"
+    ARRAYS = (("nodes", "nodes"), ("from", "dist_from"), ("to", "dist_to"))
+
+    def __init__(self, nodes, dist_from, dist_to, weights, edge_cost):
+        super().__init__(weights, edge_cost)
+        self.nodes = nodes  # int64[K]
+        self.dist_from = dist_from  # float64[K, V], d(L, v)
+        self.dist_to = dist_to  # float64[K, V], d(v, L)
+
+    @classmethod
+    def build(cls, graph, k=8, weights=None, seed=0):
+        """Farthest-point selection: each new landmark is the node farthest from all chosen so far"""
+        weights = weight_vector(graph, weights)
+        edge_cost = weights @ graph.costs
+        k = min(k, graph.num_nodes)
+
+        start = int(np.random.default_rng(seed).integers(graph.num_nodes))
+        separation = dijkstra(graph, start, edge_cost) + dijkstra(graph, start, edge_cost, reverse=True)
+        nodes, dist_from, dist_to = [], [], []
+
+        for i in range(k):
+            # inf separation means not connected to any landmark yet: cover that part first
+            landmark = int(np.argmax(separation))
+            if nodes and separation[landmark] == 0:
+                break
+            nodes.append(landmark)
+            dist_from.append(dijkstra(graph, landmark, edge_cost))
+            dist_to.append(dijkstra(graph, landmark, edge_cost, reverse=True))
+            reach = dist_from[-1] + dist_to[-1]
+            separation = reach if i == 0 else np.minimum(separation, reach)
+
+        return cls(np.array(nodes, dtype=np.int64), np.vstack(dist_from), np.vstack(dist_to),
+                   weights, edge_cost)
+
+    @staticmethod
+    def still_valid(edge_cost, stored_cost):
+        # Raised costs keep every bound admissible; a lowered one could make it overestimate
+        return not (edge_cost < stored_cost).any()
+
+    def summary(self, graph):
+        return f"{len(self.nodes)} landmarks ({', '.join(graph.symbols.translate(self.nodes))})"
+
+    def bound_to(self, target):
+        """v -> admissible lower bound on d(v, target) (inf: target unreachable from v)"""
+        from_target, to_target = self.dist_from[:, target], self.dist_to[:, target]
+
+        def bound(v):
+            with np.errstate(invalid="ignore"):
+                bounds = np.fmax(from_target - self.dist_from[:, v], self.dist_to[:, v] - to_target)
+            # inf - inf gives nan, which fmax skips; a node with no finite bound gets 0
+            return float(np.fmax(np.fmax.reduce(bounds), 0.0))
+        return bound
+
+    def bound_from(self, source):
+        """v -> admissible lower bound on d(source, v)"""
+        from_source, to_source = self.dist_from[:, source], self.dist_to[:, source]
+
+        def bound(v):
+            with np.errstate(invalid="ignore"):
+                bounds = np.fmax(self.dist_from[:, v] - from_source, to_source - self.dist_to[:, v])
+            return float(np.fmax(np.fmax.reduce(bounds), 0.0))
+        return bound
+
+
+def main():
+    precompute_main("Precompute ALT landmarks into a graph snapshot",
+                    lambda graph, weights, args: Landmarks.build(graph, args.k, weights),
+                    lambda parser: parser.add_argument("-k", type=int, default=8, help="number of landmarks"))
+
+
+if __name__ == "__main__":
+    main()
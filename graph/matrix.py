@@ -0,0 +1,126 @@
+"""
+One-to-many and many-to-many route costs
+
+One Dijkstra search per distinct source settles every target in a single
+pass and stops as soon as the last of them is settled, instead of running a
+separate A* per origin/destination pair.
+"""
+
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+from graph.heap import IndexedHeap
+from graph.snapshot import add_graph_arguments, load_graph, weights_from_args
+
+
+class DistanceMatrix:
+    def __init__(self, sources, targets, costs, breakdown):
+        self.sources = sources  # int64[S] node indices
+        self.targets = targets  # int64[T] node indices
+        self.costs = costs  # float64[S, T] weighted route cost, inf when unreachable
+        self.breakdown = breakdown  # {column: float64[S, T]} totals along each route, or {}
+
+    def column(self, name):
+        return self.breakdown[name]
+
+
+def cost_matrix(graph, sources, targets, weights=None, breakdown=False):
+    """
+    Cheapest route costs from every source to every target (node indices),
+    under the {column: weight} edge cost (None: every column counts once).
+    breakdown=True also sums each cost column along the chosen routes.
+    """
+    sources = np.asarray(sources, dtype=np.int64).reshape(-1)
+    targets = np.asarray(targets, dtype=np.int64).reshape(-1)
+    edge_cost = graph.weighted_cost(weights)
+
+    costs = np.full((len(sources), len(targets)), np.inf)
+    totals = np.full((len(graph.columns), len(sources), len(targets)), np.inf) if breakdown else None
+
+    rows = {}
+    for i, source in enumerate(sources.tolist()):
+        rows.setdefault(source, []).append(i)
+
+    for source, row_ids in rows.items():
+        dist, totals_at = _search(graph, source, targets, edge_cost, breakdown)
+        costs[row_ids] = dist[targets]
+        if breakdown:
+            totals[:, row_ids] = totals_at[:, None, :]
+
+    columns = {name: totals[c] for c, name in enumerate(graph.columns)} if breakdown else {}
+    return DistanceMatrix(sources, targets, costs, columns)
+
+
+def one_to_many(graph, source, targets, weights=None, breakdown=False):
+    """cost_matrix with a single source: the returned matrix has one row"""
+    return cost_matrix(graph, [source], targets, weights, breakdown)
+
+
+def _search(graph, source, targets, edge_cost, breakdown):
+    """
+    Costs from source to every node settled before the last target (inf for the
+    rest) and, with breakdown, the column totals along the route to each target.
+    """
+    offsets = graph.offsets
+    tentative = [math.inf] * graph.num_nodes
+    tentative[source] = 0.0
+    settled = np.zeros(graph.num_nodes, dtype=bool)
+    parents = {source: (None, -1)}  # node -> (previous node, edge id)
+    remaining = set(targets.tolist())
+
+    heap = IndexedHeap()
+    heap.push(source, 0.0)
+    while heap and remaining:
+        d, u = heap.pop()
+        settled[u] = True
+        remaining.discard(u)
+        lo, hi = int(offsets[u]), int(offsets[u + 1])
+        for e, (v, cost) in enumerate(zip(graph.targets[lo:hi].tolist(), edge_cost[lo:hi].tolist()), lo):
+            nd = d + cost
+            if nd < tentative[v]:
+                tentative[v] = nd
+                parents[v] = (u, e)
+                heap.push(v, nd)
+
+    # Nodes relaxed but never settled do not have their final cost yet
+    dist = np.where(settled, tentative, np.inf)
+    if not breakdown:
+        return dist, None
+
+    totals = np.full((len(graph.columns), len(targets)), np.inf)
+    for j in np.flatnonzero(np.isfinite(dist[targets])).tolist():
+        edges = []
+        node, e = parents[int(targets[j])]
+        while node is not None:
+            edges.append(e)
+            node, e = parents[node]
+        totals[:, j] = graph.costs[:, edges].sum(axis=1)
+    return dist, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route cost matrix between sets of nodes")
+    parser.add_argument("csv_path")
+    parser.add_argument("--sources", nargs="+", required=True)
+    parser.add_argument("--targets", nargs="+", help="default: the sources")
+    parser.add_argument("--breakdown", action="store_true", help="also print each cost column")
+    add_graph_arguments(parser)
+    args = parser.parse_args()
+
+    graph = load_graph(args.csv_path, args.columns, symmetric=args.symmetric)
+    weights = weights_from_args(args)
+    target_names = args.targets or args.sources
+    matrix = cost_matrix(graph, graph.symbols.indices(args.sources), graph.symbols.indices(target_names),
+                         weights, args.breakdown)
+
+    print(pd.DataFrame(matrix.costs, index=args.sources, columns=target_names))
+    for name, values in matrix.breakdown.items():
+        print(f"\n{name}:")
+        print(pd.DataFrame(values, index=args.sources, columns=target_names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Multi-criteria label-setting search: every non-dominated route
+
+Each label is a vector of per-column totals at a node. Labels leave the queue
+by increasing total, so no later label can dominate one already settled. A
+new label is dropped when a label at its node, or a route already reaching
+the target, is at least as good on every column. For the target check the
+label is extended by per-column lower bounds from one reverse Dijkstra per column.
+"""
+
+import argparse
+
+import numpy as np
+
+from graph.heap import IndexedHeap
+from graph.search import dijkstra
+from graph.snapshot import add_graph_arguments, load_graph
+
+
+def pareto_routes(graph, source, target, columns=None):
+    """
+    Pareto front of routes from source to target over the given cost columns
+    (default: all of them), as [(path of node indices, {column: total})]
+    sorted by the sum of the totals.
+    """
+    columns = list(columns or graph.columns)
+    rows = [graph.columns.index(name) for name in columns]
+    edge_costs = graph.costs[rows]
+    # Lower bound on what is left to pay on each column from every node
+    remaining = np.vstack([dijkstra(graph, target, edge_costs[i], reverse=True) for i in range(len(rows))]).T
+    if not np.isfinite(remaining[source]).all():
+        return []
+    remaining = [tuple(bound) for bound in remaining.tolist()]
+
+    offsets = graph.offsets
+    costs_by_edge = edge_costs.T.tolist()
+    zero = (0.0,) * len(rows)
+
+    # Label i: totals[i] at nodes[i], reached from label parents[i]
+    totals, nodes, parents = [zero], [source], [-1]
+    buckets = {source: [0]}  # node -> ids of its live labels
+    dead = set()
+    front = []  # ids of the labels that reached the target
+
+    queue = IndexedHeap()
+    queue.push(0, (0.0, zero))
+    while queue:
+        _, label = queue.pop()
+        if label in dead:
+            continue
+        u = nodes[label]
+        if u == target:
+            front.append(label)
+            continue
+
+        lo, hi = int(offsets[u]), int(offsets[u + 1])
+        for e, v in enumerate(graph.targets[lo:hi].tolist(), lo):
+            new = tuple(a + b for a, b in zip(totals[label], costs_by_edge[e]))
+            bound = tuple(a + b for a, b in zip(new, remaining[v]))
+            if bound[0] == float('inf'):
+                continue
+            if any(_dominates(totals[f], bound) for f in front):
+                continue
+            bucket = buckets.setdefault(v, [])
+            if any(_dominates(totals[other], new) for other in bucket):
+                continue
+
+            # The new label replaces every queued label at v that it dominates
+            for other in bucket:
+                if _dominates(new, totals[other]):
+                    dead.add(other)
+            bucket[:] = [other for other in bucket if other not in dead]
+
+            totals.append(new)
+            nodes.append(v)
+            parents.append(label)
+            bucket.append(len(totals) - 1)
+            queue.push(len(totals) - 1, (sum(new), new))
+
+    routes = []
+    for label in front:
+        path, end = [], label
+        while end >= 0:
+            path.append(nodes[end])
+            end = parents[end]
+        routes.append((path[::-1], dict(zip(columns, totals[label]))))
+    return routes
+
+
+def _dominates(a, b):
+    """a is at least as good as b on every column"""
+    return all(x <= y for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Every non-dominated route between two nodes")
+    parser.add_argument("csv_path")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    add_graph_arguments(parser, weights=False)
+    args = parser.parse_args()
+
+    graph = load_graph(args.csv_path, args.columns, symmetric=args.symmetric)
+    routes = pareto_routes(graph, graph.symbols[args.source], graph.symbols[args.target])
+    print(f"{len(routes)} non-dominated routes")
+    for path, totals in routes:
+        summary = ", ".join(f"{name} {value:g}" for name, value in totals.items())
+        print(f"{' -> '.join(graph.symbols.translate(path))}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Shortest-path searches over a CSRGraph shared by the preprocessing stages
+"""
+
+import math
+
+import numpy as np
+
+from graph.heap import IndexedHeap
+
+
+def dijkstra(graph, source, edge_cost, reverse=False):
+    """
+    One-to-all shortest-path costs from source, or to source when reverse=True
+    (the search then follows the in-edges). Unreachable nodes cost inf.
+    """
+    expand = graph.in_edges if reverse else graph.out_edges
+    dist = [math.inf] * graph.num_nodes
+    dist[source] = 0.0
+    heap = IndexedHeap()
+    heap.push(source, 0.0)
+
+    while heap:
+        d, u = heap.pop()
+        for v, cost in expand(u, edge_cost):
+            nd = d + cost
+            if nd < dist[v]:
+                dist[v] = nd
+                heap.push(v, nd)
+
+    return np.array(dist)
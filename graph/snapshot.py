@@ -0,0 +1,346 @@
+"""
+Versioned binary snapshots of a CSRGraph, loaded through memory maps
+
+Layout: magic, format version and header length, a JSON header, then every
+array 64-byte aligned so it can be mapped straight from the page cache.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import weakref
+
+import numpy as np
+
+from graph.csr import COST_COLUMNS, CSRGraph, weight_vector
+from graph.geo import default_coordinates_path, load_coordinates
+from graph.ingest import load_csv
+
+MAGIC = b"CSRGRAPH"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sIQ")  # magic, format version, header length
+
+
+def save_snapshot(graph, path, source=None):
+    """Writes graph to path atomically, so readers never see a partial file"""
+    encoded = [name.encode("utf-8") for name in graph.symbols.names]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+
+    arrays = {
+        "offsets": graph.offsets,
+        "targets": graph.targets,
+        "costs": graph.costs,
+        "name_offsets": name_offsets,
+        "name_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+    for name, array in graph.sections.items():
+        arrays["section:" + name] = array
+
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position = _align(position + array.nbytes)
+
+    header = json.dumps({
+        "columns": list(graph.columns),
+        "symmetric": graph.symmetric,
+        "arrays": layout,
+        "source": source,
+    }).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + position)
+        # mkstemp creates the file 0600: give it the mode a plain open() would, so
+        # workers under other uids can map it too
+        os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) != _PREFIX.size:
+            raise ValueError(f"{path} is not a graph snapshot")
+        magic, version, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    header["header_length"] = header_len
+    header["data_start"] = _align(_PREFIX.size + header_len)
+    return header
+
+
+def load_snapshot(path, columns=None):
+    """
+    Maps a snapshot copy-on-write: pages are shared between every process that
+    loads the same file, and in-place cost edits stay private to the caller.
+    columns relabels the cost columns (their count must match the snapshot).
+    """
+    header = read_header(path)
+    stored_columns = header["columns"]
+    if columns is not None and len(columns) != len(stored_columns):
+        raise ValueError(f"{path} stores {len(stored_columns)} cost columns, got {len(columns)}")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="c", shape=shape,
+                                     offset=header["data_start"] + spec["offset"])
+
+    name_offsets = arrays.pop("name_offsets").tolist()
+    name_data = arrays.pop("name_data").tobytes()
+    names = [name_data[lo:hi].decode("utf-8") for lo, hi in zip(name_offsets, name_offsets[1:])]
+
+    graph = CSRGraph(arrays.pop("offsets"), arrays.pop("targets"), arrays.pop("costs"), names,
+                     columns or stored_columns)
+    graph.sections = {name[len("section:"):]: array for name, array in arrays.items()}
+    graph.symmetric = header.get("symmetric", False)
+    return graph
+
+
+def default_snapshot_path(csv_path, symmetric=False):
+    base, _ = os.path.splitext(csv_path)
+    return base + (".symmetric" if symmetric else "") + ".graph"
+
+
+def load_graph(csv_path, columns=COST_COLUMNS, symmetric=False, snapshot_path=None,
+               coordinates_path=None):
+    """
+    CSRGraph for csv_path, memory-mapped from its snapshot. The CSV is parsed
+    again (and the snapshot rewritten) only when its mtime and hash both changed.
+    Node coordinates are attached from coordinates_path, or from the
+    "<name>.coords.csv" file next to the CSV when there is one.
+    """
+    graph = _load_graph(csv_path, columns, symmetric, snapshot_path)
+    coordinates_path = coordinates_path or default_coordinates_path(csv_path)
+    if os.path.exists(coordinates_path):
+        graph.coordinates = load_coordinates(graph, coordinates_path)
+    return graph
+
+
+def _load_graph(csv_path, columns, symmetric, snapshot_path):
+    snapshot_path = snapshot_path or default_snapshot_path(csv_path, symmetric)
+    stat = os.stat(csv_path)
+
+    try:
+        header = read_header(snapshot_path)
+    except (OSError, ValueError):
+        header = None
+
+    if header is not None and _is_current(header, csv_path, stat, len(columns), symmetric):
+        if header["source"].get("mtime_ns") != stat.st_mtime_ns:
+            # Same content under a new mtime: record it, so later loads skip the hash
+            try:
+                _update_source(snapshot_path, header, dict(header["source"], mtime_ns=stat.st_mtime_ns))
+            except OSError:
+                pass
+        return load_snapshot(snapshot_path, columns)
+
+    graph = load_csv(csv_path, columns, symmetric=symmetric)
+    try:
+        save_snapshot(graph, snapshot_path, source_info(csv_path, stat, symmetric))
+    except OSError:
+        pass  # Read-only data directory: keep working from the CSV
+    return graph
+
+
+def _is_current(header, csv_path, stat, num_columns, symmetric):
+    source = header.get("source") or {}
+    if len(header["columns"]) != num_columns or source.get("symmetric") != symmetric:
+        return False
+    if source.get("size") != stat.st_size:
+        return False
+    if source.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    return source.get("sha256") == _file_hash(csv_path)
+
+
+def _update_source(path, header, source):
+    """
+    Replaces the source record in the header of the snapshot at path. The
+    header is patched in place (padded with spaces, which JSON ignores) when
+    the new one fits, and the whole snapshot is rewritten otherwise.
+    """
+    fields = {key: value for key, value in header.items() if key not in ("header_length", "data_start")}
+    encoded = json.dumps(dict(fields, source=source)).encode("utf-8")
+    if len(encoded) <= header["header_length"]:
+        with open(path, "r+b") as f:
+            f.seek(_PREFIX.size)
+            f.write(encoded.ljust(header["header_length"]))
+    else:
+        save_snapshot(load_snapshot(path), path, source)
+
+
+def source_info(csv_path, stat, symmetric):
+    return {
+        "path": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _file_hash(csv_path),
+        "symmetric": symmetric,
+    }
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _umask():
+    # The umask can only be read by setting it
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def _align(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+class PrecomputedSections:
+    """
+    Tables precomputed for one weighting of the cost columns and kept in
+    graph.sections as "<PREFIX>_<name>", next to the weights and the edge cost
+    they were built for, so save_snapshot persists them. Subclasses list their
+    arrays in ARRAYS as (section name, attribute) pairs and take them, in that
+    order, as the first constructor arguments, followed by weights and edge_cost.
+    """
+    PREFIX = None
+    ARRAYS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # graph -> (graph version, weights, instance or None), so validity is checked once per version
+        cls._checked = weakref.WeakKeyDictionary()
+
+    def __init__(self, weights, edge_cost):
+        self.weights = weights  # float64[len(columns)], the weighting the tables were built for
+        self.edge_cost = edge_cost  # float64[E], the edge cost under it at build time
+
+    @classmethod
+    def section_names(cls):
+        return [f"{cls.PREFIX}_{name}" for name, _ in cls.ARRAYS] + [f"{cls.PREFIX}_weights", f"{cls.PREFIX}_cost"]
+
+    @classmethod
+    def from_graph(cls, graph, weights=None):
+        """
+        Tables stored in graph.sections for this weighting, or None when there
+        are none or a cost update since they were built invalidates them.
+        """
+        names = cls.section_names()
+        if any(name not in graph.sections for name in names):
+            return None
+        weights = weight_vector(graph, weights)
+        if not np.array_equal(graph.sections[names[-2]], weights):
+            return None
+
+        edges = None
+        cached = cls._checked.get(graph)
+        if cached is not None and np.array_equal(cached[1], weights):
+            version, _, tables = cached
+            if version == graph.version:
+                return tables
+            if tables is not None:
+                edges = graph.changes_since(version)  # only re-check what changed since
+        if edges is None:
+            edges = slice(None)
+
+        stored_cost = graph.sections[names[-1]]
+        tables = None
+        if cls.still_valid(graph.weighted_cost(weights)[edges], stored_cost[edges]):
+            tables = cls(*(graph.sections[name] for name in names[:-2]), weights, stored_cost)
+        cls._checked[graph] = (graph.version, weights, tables)
+        return tables
+
+    @staticmethod
+    def still_valid(edge_cost, stored_cost):
+        """Whether tables built for stored_cost hold for edge_cost: by default only when unchanged"""
+        return np.array_equal(edge_cost, stored_cost)
+
+    def store(self, graph):
+        """Puts the tables in graph.sections so save_snapshot persists them"""
+        arrays = [getattr(self, attribute) for _, attribute in self.ARRAYS] + [self.weights, self.edge_cost]
+        graph.sections.update(zip(self.section_names(), arrays))
+        self._checked.pop(graph, None)
+
+
+def add_graph_arguments(parser, weights=True):
+    """The --columns, --weights and --symmetric options every graph tool shares"""
+    parser.add_argument("--columns", nargs="+", default=list(COST_COLUMNS))
+    if weights:
+        parser.add_argument("--weights", nargs="+", type=float, help="one weight per column (default: 1)")
+    parser.add_argument("--symmetric", action="store_true", help="store every edge in both directions")
+
+
+def weights_from_args(args):
+    return dict(zip(args.columns, args.weights)) if args.weights else None
+
+
+def precompute_main(description, build, arguments=None):
+    """
+    Command line that precomputes tables into the snapshot of a CSV: build(graph,
+    weights, args) returns the PrecomputedSections, whose summary(graph) is
+    printed. arguments(parser) adds any options of its own.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("csv_path")
+    parser.add_argument("-o", "--output", help="snapshot path (default: next to the CSV)")
+    add_graph_arguments(parser)
+    if arguments is not None:
+        arguments(parser)
+    args = parser.parse_args()
+
+    output = args.output or default_snapshot_path(args.csv_path, args.symmetric)
+    graph = load_graph(args.csv_path, args.columns, symmetric=args.symmetric, snapshot_path=output)
+    tables = build(graph, weights_from_args(args), args)
+    tables.store(graph)
+    save_snapshot(graph, output, source_info(args.csv_path, os.stat(args.csv_path), args.symmetric))
+    print(f"{output}: {tables.summary(graph)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a CSV edge list into a graph snapshot")
+    parser.add_argument("csv_path")
+    parser.add_argument("-o", "--output", help="snapshot path (default: next to the CSV)")
+    add_graph_arguments(parser, weights=False)
+    args = parser.parse_args()
+
+    output = args.output or default_snapshot_path(args.csv_path, args.symmetric)
+    stat = os.stat(args.csv_path)
+    graph = load_csv(args.csv_path, args.columns, symmetric=args.symmetric)
+    save_snapshot(graph, output, source_info(args.csv_path, stat, args.symmetric))
+    print(f"ingested {graph.ingest_stats}")
+    print(f"{output}: {graph.num_nodes} nodes, {graph.num_edges} edges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Interned node-name table with O(1) lookups in both directions
+"""
+
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class SymbolTable(Mapping):
+    """Maps node names to indices like a dict, and indices back to names through a contiguous array"""
+
+    def __init__(self, names):
+        self.names = np.empty(len(names), dtype=object)
+        self.names[:] = [sys.intern(str(name)) for name in names]
+        self._index = {name: i for i, name in enumerate(self.names)}
+        if len(self._index) != len(self.names):
+            raise ValueError("Node names must be unique")
+
+    def __getitem__(self, name):
+        return self._index[name]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __repr__(self):
+        return repr(self._index)
+
+    def name(self, i):
+        return self.names[i]
+
+    def translate(self, path):
+        """Names of a whole path of indices in one vectorized gather"""
+        return self.names[np.asarray(path, dtype=np.intp)].tolist()
+
+    def indices(self, names):
+        return np.fromiter((self._index[name] for name in names), dtype=np.int64, count=len(names))
@@ -1,76 +1,77 @@
-import csv
 import os
+import sys
 import random
 import math
-from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from graph.cache import route_cache, route_key
+from graph.snapshot import load_graph
+
+COLUNAS = ('toll', 'fuel', 'distance')
 
 def importar_grafo_csv(nome_arquivo):
     """Importa o grafo do CSV e retorna a estrutura de adjacência"""
     try:
         caminho = os.path.join(os.path.dirname(__file__), nome_arquivo)
-        with open(caminho, newline='', encoding='utf-8') as arquivo:
-            leitor = csv.reader(arquivo)
-            next(leitor)  # Pular cabeçalho
-            
-            grafo = defaultdict(dict)
-            cidades = set()
-            
-            for linha in leitor:
-                origem, destino, pedagio, combustivel, distancia = linha
-                grafo[origem][destino] = {
-                    'toll': float(pedagio),
-                    'fuel': float(combustivel),
-                    'distance': float(distancia)
-                }
-                cidades.update([origem, destino])
-            
-            return grafo, sorted(cidades)
-            
+        grafo = load_graph(caminho, columns=COLUNAS)
+        return grafo, sorted(grafo.symbols)
+
     except FileNotFoundError:
         print(f"\nERRO: Arquivo '{nome_arquivo}' não encontrado.")
         print(f"Diretório atual: {os.path.dirname(__file__)}")
         exit()
 
-def calcular_custo_composto(origem, destino, grafo, pesos):
-    """Calcula custo composto entre duas cidades"""
-    if destino not in grafo[origem]:
+def calcular_custo_composto(origem, destino, grafo, custos):
+    """Calcula custo composto entre duas cidades (custos: grafo.weighted_cost(pesos))"""
+    aresta = grafo.edge_id(origem, destino)
+    if aresta < 0:
         return float('inf')
-    dados = grafo[origem][destino]
-    return (pesos['toll'] * dados['toll'] + 
-            pesos['fuel'] * dados['fuel'] + 
-            pesos['distance'] * dados['distance'])
+    return float(custos[aresta])
 
-def expandir(grafo, arvore, cidade_alvo, pesos, max_passos=1000):
+def expandir(grafo, arvore, cidade_alvo, custos, max_passos=1000):
     """Expande uma árvore em direção a um alvo considerando custo composto"""
     # Encontra a cidade mais próxima na árvore (menor custo composto)
     cidade_prox = min(arvore.keys(),
-                     key=lambda x: calcular_custo_composto(x, cidade_alvo, grafo, pesos))
+                     key=lambda x: calcular_custo_composto(x, cidade_alvo, grafo, custos))
     
     if cidade_prox == cidade_alvo:
         return cidade_alvo
     
-    # Tenta conectar diretamente
-    if cidade_alvo in grafo[cidade_prox]:
-        custo = calcular_custo_composto(cidade_prox, cidade_alvo, grafo, pesos)
-        if custo <= max_passos:
-            arvore[cidade_alvo] = cidade_prox
-            return cidade_alvo
+    # Tenta conectar diretamente (um nó já na árvore nunca muda de pai, o que criaria ciclos)
+    custo = calcular_custo_composto(cidade_prox, cidade_alvo, grafo, custos)
+    if custo <= max_passos:
+        arvore.setdefault(cidade_alvo, cidade_prox)
+        return cidade_alvo
     
     # Se não, escolhe o melhor vizinho (menor custo composto)
-    vizinhos = list(grafo[cidade_prox].keys())
+    vizinhos = grafo.neighbors(cidade_prox)
     if not vizinhos:
         return cidade_prox
     
     # Escolhe o vizinho com menor custo em direção ao alvo
     cidade_nova = min(vizinhos,
-                     key=lambda x: calcular_custo_composto(cidade_prox, x, grafo, pesos) + 
-                                 calcular_custo_composto(x, cidade_alvo, grafo, pesos))
+                     key=lambda x: calcular_custo_composto(cidade_prox, x, grafo, custos) + 
+                                 calcular_custo_composto(x, cidade_alvo, grafo, custos))
     
-    arvore[cidade_nova] = cidade_prox
+    arvore.setdefault(cidade_nova, cidade_prox)
     return cidade_nova
 
 def rrt_connect_otimizado(grafo, inicio, objetivo, pesos, iteracoes=5000):
+    """RRT-Connect com cache por versão do grafo, cidades e pesos"""
+    cache = route_cache(grafo)
+    chave = route_key(grafo, ("rrt_connect_otimizado", iteracoes), inicio, objetivo, pesos)
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = pesquisar_rrt_connect_otimizado(grafo, inicio, objetivo, pesos, iteracoes)
+        cache.put(chave, resultado)
+    return resultado
+
+def pesquisar_rrt_connect_otimizado(grafo, inicio, objetivo, pesos, iteracoes=5000):
     """RRT-Connect otimizado para múltiplos objetivos"""
+    inicio, objetivo = grafo.symbols[inicio], grafo.symbols[objetivo]
+    # Custo composto de todas as arestas, calculado uma só vez para estes pesos
+    custos = grafo.weighted_cost(pesos)
     arvore_a = {inicio: None}
     arvore_b = {objetivo: None}
     melhor_caminho = None
@@ -82,11 +83,11 @@ def rrt_connect_otimizado(grafo, inicio, objetivo, pesos, iteracoes=5000):
         if random.random() < 0.8:
             cidade_alvo = objetivo if random.random() < 0.5 else inicio
         else:
-            cidade_alvo = random.choice(list(grafo.keys()))
+            cidade_alvo = random.randrange(grafo.num_nodes)
         
         # Expande ambas as árvores
-        nova_a = expandir(grafo, arvore_a, cidade_alvo, pesos)
-        nova_b = expandir(grafo, arvore_b, cidade_alvo, pesos)
+        nova_a = expandir(grafo, arvore_a, cidade_alvo, custos)
+        nova_b = expandir(grafo, arvore_b, cidade_alvo, custos)
         
         # Verifica conexão
         if nova_a in arvore_b:
@@ -108,6 +109,8 @@ def rrt_connect_otimizado(grafo, inicio, objetivo, pesos, iteracoes=5000):
         # Troca as árvores para balancear
         arvore_a, arvore_b = arvore_b, arvore_a
     
+    if melhor_caminho is not None:
+        melhor_caminho = grafo.symbols.translate(melhor_caminho)
     return melhor_caminho, melhor_custo, melhores_custos_individuais
 
 def reconstruir_caminho(arvore_a, arvore_b, ponto_conexao):
@@ -130,12 +133,8 @@ def reconstruir_caminho(arvore_a, arvore_b, ponto_conexao):
 
 def calcular_custos_totais(caminho, grafo):
     """Calcula todos os custos do caminho"""
-    toll_total = fuel_total = distance_total = 0
-    for i in range(len(caminho)-1):
-        dados = grafo[caminho[i]][caminho[i+1]]
-        toll_total += dados['toll']
-        fuel_total += dados['fuel']
-        distance_total += dados['distance']
+    custos = grafo.path_costs(caminho)
+    toll_total, fuel_total, distance_total = custos['toll'], custos['fuel'], custos['distance']
     
     custo_composto = toll_total + fuel_total + distance_total
     custos_individuais = {
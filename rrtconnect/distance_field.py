@@ -0,0 +1,90 @@
+"""
+Signed distance field of the inflated obstacles, sampled on a regular grid
+
+Each sample holds the exact signed distance from its grid point to the
+nearest inflated obstacle (negative inside). Distance changes by at most the
+distance moved, so a lookup at the nearest sample is off by at most half a
+cell diagonal. Queries answer True or False only when that slack cannot
+change the outcome, and None otherwise, leaving the few points and segments
+right at an obstacle edge to the exact test.
+"""
+
+import math
+import numpy as np
+
+RESOLUTION = 0.1
+
+
+class DistanceField:
+    def __init__(self, sdf, origin, resolution):
+        self.sdf = sdf  # float64[nx, ny], signed distance at origin + (i, j) * resolution
+        self.occupied = sdf <= 0  # occupancy bitmap of the same samples
+        self.origin = origin
+        self.resolution = resolution
+        self.slack = resolution * math.sqrt(2) / 2  # farthest any point is from its nearest sample
+
+    @classmethod
+    def from_utils(cls, utils, resolution=RESOLUTION):
+        """Field over the environment and every obstacle, inflated by utils.delta"""
+        centers, radii = utils.circle_centers, utils.circle_radii
+        lo = np.min(np.vstack([[utils.env.x_range[0], utils.env.y_range[0]],
+                               utils.box_min, centers - radii[:, None]]), axis=0) - resolution
+        hi = np.max(np.vstack([[utils.env.x_range[1], utils.env.y_range[1]],
+                               utils.box_max, centers + radii[:, None]]), axis=0) + resolution
+
+        nx, ny = np.ceil((hi - lo) / resolution).astype(int) + 1
+        x = (lo[0] + resolution * np.arange(nx))[:, None]
+        y = (lo[1] + resolution * np.arange(ny))[None, :]
+
+        sdf = np.full((nx, ny), np.inf)
+        for (cx, cy), r in zip(centers, radii):
+            np.minimum(sdf, np.hypot(x - cx, y - cy) - r, out=sdf)
+        for (x0, y0), (x1, y1) in zip(utils.box_min, utils.box_max):
+            # Per axis: positive outside the box band, negative inside it
+            qx = np.abs(x - (x0 + x1) / 2) - (x1 - x0) / 2
+            qy = np.abs(y - (y0 + y1) / 2) - (y1 - y0) / 2
+            box = np.hypot(np.maximum(qx, 0), np.maximum(qy, 0)) + np.minimum(np.maximum(qx, qy), 0)
+            np.minimum(sdf, box, out=sdf)
+
+        return cls(sdf, lo, resolution)
+
+    def value(self, x, y):
+        """Signed distance at the sample nearest (x, y), or None outside the grid"""
+        i = round((x - self.origin[0]) / self.resolution)
+        j = round((y - self.origin[1]) / self.resolution)
+        if 0 <= i < self.sdf.shape[0] and 0 <= j < self.sdf.shape[1]:
+            return self.sdf[i, j]
+        return None
+
+    def is_inside(self, x, y):
+        """Whether (x, y) is in an obstacle, or None when too close to an edge to tell"""
+        d = self.value(x, y)
+        if d is None or abs(d) <= self.slack:
+            return None
+        return bool(d < 0)
+
+    def is_collision(self, x0, y0, x1, y1):
+        """
+        Whether the segment touches an obstacle, or None when it passes too close
+        to one to tell. Marches along the segment by the clearance guaranteed
+        around each point, which the segment cannot cross an obstacle within.
+        Near an edge it keeps going by half a cell, so a point found inside an
+        obstacle further on still proves a hit.
+        """
+        length = math.hypot(x1 - x0, y1 - y0)
+        t = 0.0
+        unproven = False  # some stretch was skipped without a clearance guarantee
+        while True:
+            f = t / length if length > 0 else 0.0
+            d = self.value(x0 + f * (x1 - x0), y0 + f * (y1 - y0))
+            if d is None:
+                return None
+            if d + self.slack < 0:
+                return True
+            clearance = d - self.slack
+            if clearance < self.resolution / 2:
+                unproven = True
+                clearance = self.resolution / 2
+            t += clearance
+            if t >= length:
+                return None if unproven else False
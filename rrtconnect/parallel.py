@@ -0,0 +1,101 @@
+"""
+Multi-seed RRT-Connect over a process pool
+
+Runs independent planners with distinct seeds on every core. In "first"
+mode the first path found wins; in "best" mode the shortest path found
+before the wall-clock budget runs out wins. Either way the remaining runs
+are cancelled: queued ones never start and running ones see the shared
+stop event and return within one iteration.
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rrt_connect import RrtConnect
+from smoothing import path_length
+
+_stop = None  # the pool's stop event, set in each worker by _init_worker
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def _plan(s_start, s_goal, step_len, goal_sample_rate, iter_max, seed):
+    planner = RrtConnect(s_start, s_goal, step_len, goal_sample_rate, iter_max, seed=seed)
+    return planner.planning(stop=_stop), seed
+
+
+def plan_parallel(s_start, s_goal, step_len, goal_sample_rate, iter_max,
+                  runs=None, workers=None, mode="first", budget=None, seed=None):
+    """
+    (path, length, seed of the run that found it), or (None, inf, None) when no
+    run finds a path in time. runs planners (default: one per worker) get seeds
+    drawn from seed; budget is in seconds (None: wait for every run).
+    """
+    if mode not in ("first", "best"):
+        raise ValueError(f"unknown mode {mode!r}, expected 'first' or 'best'")
+    workers = workers or os.cpu_count()
+    runs = runs or workers
+    seeds = np.random.SeedSequence(seed).generate_state(runs).tolist()
+    deadline = None if budget is None else time.monotonic() + budget
+
+    best = None, math.inf, None
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop,)) as pool:
+        pending = {pool.submit(_plan, s_start, s_goal, step_len, goal_sample_rate, iter_max, s)
+                   for s in seeds}
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # out of time
+            for future in done:
+                path, run_seed = future.result()
+                if path is not None and path_length(path) < best[1]:
+                    best = path, path_length(path), run_seed
+            if mode == "first" and best[0] is not None:
+                break
+
+        stop.set()
+        for future in pending:
+            future.cancel()
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RRT-Connect from several seeds at once")
+    parser.add_argument("--runs", type=int, help="planners to launch (default: one per core)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--best", action="store_true", help="keep the shortest path instead of the first")
+    parser.add_argument("--budget", type=float, help="wall-clock seconds before giving up on the rest")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    x_start = (2, 2)  # Starting node
+    x_goal = (49, 24)  # Goal node
+
+    started = time.perf_counter()
+    path, length, seed = plan_parallel(x_start, x_goal, 0.8, 0.05, 5000, runs=args.runs,
+                                       workers=args.workers, mode="best" if args.best else "first",
+                                       budget=args.budget, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    if path is None:
+        print(f"No path found ({elapsed:.2f}s)")
+    else:
+        print(f"Path of {len(path)} points, length {length:.2f}, seed {seed} ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
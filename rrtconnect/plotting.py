@@ -5,10 +5,13 @@ Plotting tools for Sampling-based algorithms
 
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.collections import LineCollection
 import os
 import sys
 import env
 
+MAX_FRAMES = 100
+
 
 class Plotting:
     def __init__(self, x_start, x_goal):
@@ -87,21 +90,19 @@ class Plotting:
 
     @staticmethod
     def plot_visited_connect(V1, V2):
-        len1, len2 = len(V1), len(V2)
+        # Whole batches of edges per frame, so the animation length does not grow with the trees
+        edges1, edges2 = V1.segments(), V2.segments()
+        batch = max(2, -(-max(len(edges1), len(edges2)) // MAX_FRAMES))
+        ax = plt.gca()
 
-        for k in range(max(len1, len2)):
-            if k < len1:
-                if V1[k].parent:
-                    plt.plot([V1[k].x, V1[k].parent.x], [V1[k].y, V1[k].parent.y], "-g")
-            if k < len2:
-                if V2[k].parent:
-                    plt.plot([V2[k].x, V2[k].parent.x], [V2[k].y, V2[k].parent.y], "-g")
+        for k in range(0, max(len(edges1), len(edges2)), batch):
+            for edges in (edges1[k:k + batch], edges2[k:k + batch]):
+                if len(edges):
+                    ax.add_collection(LineCollection(edges, colors="g"))
 
             plt.gcf().canvas.mpl_connect('key_release_event',
                                          lambda event: [exit(0) if event.key == 'escape' else None])
-
-            if k % 2 == 0:
-                plt.pause(0.001)
+            plt.pause(0.001)
 
         plt.pause(0.01)
 
@@ -10,13 +10,16 @@ import copy
 import numpy as np
 import matplotlib.pyplot as plt
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
-                "/../../Sampling_based_Planning/")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from Sampling_based_Planning.rrt_2D import env, plotting, utils
+import env, plotting, utils
+from smoothing import shorten_path
+from tree import Tree
 
 
 class Node:
+    __slots__ = ("x", "y", "parent")
+
     def __init__(self, n):
         self.x = n[0]
         self.y = n[1]
@@ -24,18 +27,21 @@ class Node:
 
 
 class RrtConnect:
-    def __init__(self, s_start, s_goal, step_len, goal_sample_rate, iter_max):
+    def __init__(self, s_start, s_goal, step_len, goal_sample_rate, iter_max, seed=None):
         self.s_start = Node(s_start)
         self.s_goal = Node(s_goal)
         self.step_len = step_len
         self.goal_sample_rate = goal_sample_rate
         self.iter_max = iter_max
-        self.V1 = [self.s_start]
-        self.V2 = [self.s_goal]
+        self.rng = np.random.default_rng(seed)  # runs with the same seed grow the same trees
+        # Array-backed trees, each indexed by a grid hash with cells one step wide
+        self.V1 = Tree(s_start, step_len)
+        self.V2 = Tree(s_goal, step_len)
 
         self.env = env.Env()
         self.plotting = plotting.Plotting(s_start, s_goal)
         self.utils = utils.Utils()
+        self.utils.build_field()
 
         self.x_range = self.env.x_range
         self.y_range = self.env.y_range
@@ -43,33 +49,35 @@ class RrtConnect:
         self.obs_rectangle = self.env.obs_rectangle
         self.obs_boundary = self.env.obs_boundary
 
-    def planning(self):
+    def planning(self, stop=None):
+        """Path from start to goal, or None; gives up early once stop (an Event) is set"""
         for i in range(self.iter_max):
+            if stop is not None and stop.is_set():
+                return None
             node_rand = self.generate_random_node(self.s_goal, self.goal_sample_rate)
             node_near = self.nearest_neighbor(self.V1, node_rand)
             node_new = self.new_state(node_near, node_rand)
 
             if node_new and not self.utils.is_collision(node_near, node_new):
-                self.V1.append(node_new)
+                node_new = self.V1.append(node_new)
                 node_near_prim = self.nearest_neighbor(self.V2, node_new)
                 node_new_prim = self.new_state(node_near_prim, node_new)
 
                 if node_new_prim and not self.utils.is_collision(node_new_prim, node_near_prim):
-                    self.V2.append(node_new_prim)
+                    node_new_prim = self.V2.append(node_new_prim)
 
                     while True:
                         node_new_prim2 = self.new_state(node_new_prim, node_new)
                         if node_new_prim2 and not self.utils.is_collision(node_new_prim2, node_new_prim):
-                            self.V2.append(node_new_prim2)
-                            node_new_prim = self.change_node(node_new_prim, node_new_prim2)
+                            node_new_prim = self.V2.append(node_new_prim2)
                         else:
                             break
 
                         if self.is_node_same(node_new_prim, node_new):
                             break
 
-                if self.is_node_same(node_new_prim, node_new):
-                    return self.extract_path(node_new, node_new_prim)
+                    if self.is_node_same(node_new_prim, node_new):
+                        return self.extract_path(node_new, node_new_prim)
 
             if len(self.V2) < len(self.V1):
                 list_mid = self.V2
@@ -78,13 +86,6 @@ class RrtConnect:
 
         return None
 
-    @staticmethod
-    def change_node(node_new_prim, node_new_prim2):
-        node_new = Node((node_new_prim2.x, node_new_prim2.y))
-        node_new.parent = node_new_prim
-
-        return node_new
-
     @staticmethod
     def is_node_same(node_new_prim, node_new):
         if node_new_prim.x == node_new.x and \
@@ -96,16 +97,15 @@ class RrtConnect:
     def generate_random_node(self, sample_goal, goal_sample_rate):
         delta = self.utils.delta
 
-        if np.random.random() > goal_sample_rate:
-            return Node((np.random.uniform(self.x_range[0] + delta, self.x_range[1] - delta),
-                         np.random.uniform(self.y_range[0] + delta, self.y_range[1] - delta)))
+        if self.rng.random() > goal_sample_rate:
+            return Node((self.rng.uniform(self.x_range[0] + delta, self.x_range[1] - delta),
+                         self.rng.uniform(self.y_range[0] + delta, self.y_range[1] - delta)))
 
         return sample_goal
 
     @staticmethod
-    def nearest_neighbor(node_list, n):
-        return node_list[int(np.argmin([math.hypot(nd.x - n.x, nd.y - n.y)
-                                        for nd in node_list]))]
+    def nearest_neighbor(tree, n):
+        return tree[tree.nearest(n.x, n.y)]
 
     def new_state(self, node_start, node_end):
         dist, theta = self.get_distance_and_angle(node_start, node_end)
@@ -119,21 +119,10 @@ class RrtConnect:
 
     @staticmethod
     def extract_path(node_new, node_new_prim):
-        path1 = [(node_new.x, node_new.y)]
-        node_now = node_new
-
-        while node_now.parent is not None:
-            node_now = node_now.parent
-            path1.append((node_now.x, node_now.y))
-
-        path2 = [(node_new_prim.x, node_new_prim.y)]
-        node_now = node_new_prim
-
-        while node_now.parent is not None:
-            node_now = node_now.parent
-            path2.append((node_now.x, node_now.y))
+        path1 = node_new.tree.path(node_new.index)
+        path2 = node_new_prim.tree.path(node_new_prim.index)
 
-        return list(list(reversed(path1)) + path2)
+        return list(reversed(path1)) + path2
 
     @staticmethod
     def get_distance_and_angle(node_start, node_end):
@@ -148,6 +137,11 @@ def main():
 
     rrt_conn = RrtConnect(x_start, x_goal, 0.8, 0.05, 5000)
     path = rrt_conn.planning()
+    if path:
+        path, stats = shorten_path(path, rrt_conn.utils, rng=rrt_conn.rng, smooth_iterations=2)
+        print(f"Path shortened from {stats['length_before']:.2f} to {stats['length_after']:.2f} "
+              f"({stats['reduction']:.0%}), {stats['waypoints_before']} -> {stats['waypoints_after']} "
+              f"waypoints in {stats['seconds'] * 1000:.1f} ms")
 
     rrt_conn.plotting.animation_connect(rrt_conn.V1, rrt_conn.V2, path, "RRT_CONNECT")
 
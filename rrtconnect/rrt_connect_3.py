@@ -1,73 +1,81 @@
-import csv
 import os
+import sys
 import random
 import math
-from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/../")
+
+from graph.cache import route_cache, route_key
+from graph.snapshot import load_graph
 
 def importar_grafo_csv(nome_arquivo):
     """Importa o grafo do CSV e retorna a estrutura de adjacência"""
     try:
         caminho = os.path.join(os.path.dirname(__file__), nome_arquivo)
-        with open(caminho, newline='', encoding='utf-8') as arquivo:
-            leitor = csv.reader(arquivo)
-            next(leitor)  # Pular cabeçalho
-            
-            grafo = defaultdict(dict)
-            cidades = set()
-            
-            for origem, destino, pedagio, combustivel, distancia in leitor:
-                custo = float(pedagio) + float(combustivel)
-                grafo[origem][destino] = custo
-                cidades.update([origem, destino])
-            
-            return grafo, sorted(cidades)
-            
+        grafo = load_graph(caminho)
+        return grafo, sorted(grafo.symbols)
+
     except FileNotFoundError:
         print(f"Erro: Arquivo '{nome_arquivo}' não encontrado.")
         print(f"Diretório atual: {os.getcwd()}")
         exit()
 
-def distancia(cidade1, cidade2, grafo):
+def custos_arestas(grafo):
+    """Custo de cada aresta do grafo (pedágio + combustível)"""
+    return grafo.weighted_cost({'toll': 1.0, 'fuel': 1.0, 'distance_km': 0.0})
+
+def distancia(cidade1, cidade2, grafo, custos):
     """Distância entre cidades (custo direto ou heurística)"""
-    if cidade2 in grafo[cidade1]:
-        return grafo[cidade1][cidade2]
+    aresta = grafo.edge_id(cidade1, cidade2)
+    if aresta >= 0:
+        return float(custos[aresta])
     return float('inf')  # Sem conexão direta
 
-def expandir(grafo, arvore, cidade_alvo, max_passos=1000):
+def expandir(grafo, custos, arvore, cidade_alvo, max_passos=1000):
     """Expande uma árvore em direção a um alvo"""
-    cidade_prox = min(arvore.keys(), key=lambda x: distancia(x, cidade_alvo, grafo))
+    cidade_prox = min(arvore.keys(), key=lambda x: distancia(x, cidade_alvo, grafo, custos))
     
     if cidade_prox == cidade_alvo:
         return cidade_alvo
     
-    # Tenta encontrar conexão direta
-    if cidade_alvo in grafo[cidade_prox]:
-        custo = grafo[cidade_prox][cidade_alvo]
-        if custo <= max_passos:
-            arvore[cidade_alvo] = cidade_prox
-            return cidade_alvo
+    # Tenta encontrar conexão direta (um nó já na árvore nunca muda de pai, o que criaria ciclos)
+    custo = distancia(cidade_prox, cidade_alvo, grafo, custos)
+    if custo <= max_passos:
+        arvore.setdefault(cidade_alvo, cidade_prox)
+        return cidade_alvo
     
     # Se não, escolhe uma cidade vizinha aleatória
-    vizinhos = list(grafo[cidade_prox].keys())
+    vizinhos = grafo.neighbors(cidade_prox)
     if not vizinhos:
         return cidade_prox
     
     cidade_nova = random.choice(vizinhos)
-    arvore[cidade_nova] = cidade_prox
+    arvore.setdefault(cidade_nova, cidade_prox)
     return cidade_nova
 
 def rrt_connect(grafo, inicio, objetivo, iteracoes=10000):
+    """RRT-Connect com cache: um par já pedido, com o grafo inalterado, não é recalculado"""
+    cache = route_cache(grafo)
+    chave = route_key(grafo, ("rrt_connect", iteracoes), inicio, objetivo)
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = pesquisar_rrt_connect(grafo, inicio, objetivo, iteracoes)
+        cache.put(chave, resultado)
+    return resultado
+
+def pesquisar_rrt_connect(grafo, inicio, objetivo, iteracoes=10000):
     """Implementação do RRT-Connect para encontrar caminho"""
-    arvore_a = {inicio: None}
-    arvore_b = {objetivo: None}
+    custos = custos_arestas(grafo)
+    arvore_a = {grafo.symbols[inicio]: None}
+    arvore_b = {grafo.symbols[objetivo]: None}
     
     for _ in range(iteracoes):
         # Expande árvore A
-        cidade_aleatoria = random.choice(list(grafo.keys()))
-        nova_a = expandir(grafo, arvore_a, cidade_aleatoria)
+        cidade_aleatoria = random.randrange(grafo.num_nodes)
+        nova_a = expandir(grafo, custos, arvore_a, cidade_aleatoria)
         
         # Expande árvore B em direção a nova_a
-        nova_b = expandir(grafo, arvore_b, nova_a)
+        nova_b = expandir(grafo, custos, arvore_b, nova_a)
         
         # Verifica conexão
         if nova_b in arvore_a:
@@ -85,6 +93,7 @@ def rrt_connect(grafo, inicio, objetivo, iteracoes=10000):
                 caminho.append(cidade)
                 cidade = arvore_b[cidade]
             
+            caminho = grafo.symbols.translate(caminho)
             return caminho, calcular_custo(caminho, grafo)
         
         # Troca as árvores
@@ -94,10 +103,8 @@ def rrt_connect(grafo, inicio, objetivo, iteracoes=10000):
 
 def calcular_custo(caminho, grafo):
     """Calcula o custo total do caminho"""
-    custo_total = 0
-    for i in range(len(caminho)-1):
-        custo_total += grafo[caminho[i]][caminho[i+1]]
-    return custo_total
+    custos = grafo.path_costs(grafo.symbols.indices(caminho))
+    return custos['toll'] + custos['fuel']
 
 def main():
     print("Sistema de Rotas com RRT-Connect")
@@ -0,0 +1,244 @@
+"""
+Anytime RRT*-Connect with informed sampling
+
+Both trees grow as in RRT-Connect, but every new node takes the cheapest
+parent within a radius that shrinks as the tree fills up, and then rewires
+the nodes around it through itself when that is cheaper. Every pair of
+nodes that can see each other across the trees is kept as a possible
+connection, so the best path keeps improving as costs drop. Once a path is
+known, samples come only from the ellipse with the start and goal as foci
+whose points could still lie on a shorter path.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rrt_connect import RrtConnect
+from tree import Tree
+
+REWIRE_RADIUS_STEPS = 3  # the rewiring radius never exceeds this many steps
+
+
+class CostTree(Tree):
+    """Tree that also keeps each node's path cost from the root and its children"""
+
+    def __init__(self, root, cell_size, capacity=1024):
+        self.cost = np.empty(capacity)
+        self.children = []
+        self.rewires = 0  # bumped whenever rewiring lowers the costs of a subtree
+        super().__init__(root, cell_size, capacity)
+
+    def grow(self):
+        super().grow()
+        self.cost = np.concatenate((self.cost, np.empty_like(self.cost)))
+
+    def add(self, x, y, parent=-1, cost=0.0):
+        i = super().add(x, y, parent)
+        self.cost[i] = cost
+        self.children.append([])
+        if parent >= 0:
+            self.children[parent].append(i)
+        return i
+
+    def rewire(self, i, parent, cost):
+        """Hangs node i under parent at the given cost, updating its whole subtree"""
+        self.children[self.parent[i]].remove(i)
+        self.parent[i] = parent
+        self.children[parent].append(i)
+
+        self.rewires += 1
+        saving = self.cost[i] - cost
+        stack = [i]
+        while stack:
+            v = stack.pop()
+            self.cost[v] -= saving
+            stack.extend(self.children[v])
+
+
+class RrtStarConnect(RrtConnect):
+    def __init__(self, s_start, s_goal, step_len, goal_sample_rate, iter_max, seed=None):
+        super().__init__(s_start, s_goal, step_len, goal_sample_rate, iter_max, seed=seed)
+        self.V1 = self.T_start = CostTree(s_start, step_len)
+        self.V2 = self.T_goal = CostTree(s_goal, step_len)
+
+        # Connections as (node in T_start, node in T_goal, edge length), grown by doubling
+        self.conn_start = np.empty(256, dtype=np.int64)
+        self.conn_goal = np.empty(256, dtype=np.int64)
+        self.conn_length = np.empty(256)
+        self.conn_count = 0
+        self.connected = set()  # (node in T_start, node in T_goal) pairs already recorded
+
+        # Cheapest connection as (cost, node in T_start, node in T_goal), and the
+        # rewire counts of both trees it was computed at
+        self.best = math.inf, -1, -1
+        self.best_rewires = 0, 0
+
+        # Karaman and Frazzoli's radius constant for the plane, over the whole workspace
+        area = (self.x_range[1] - self.x_range[0]) * (self.y_range[1] - self.y_range[0])
+        self.gamma = 2 * math.sqrt(1.5 * area / math.pi)
+
+    def planning(self, stop=None):
+        """Best path found within iter_max iterations, or None"""
+        best = None
+        for best, _ in self.improving(stop=stop):
+            pass
+        return best
+
+    def improving(self, budget=None, iterations=None, stop=None):
+        """
+        Yields (path, cost) every time a cheaper start-goal path appears, for at
+        most iterations rounds (default: iter_max) and budget seconds (None: no
+        limit). Stops early once stop (an Event) is set.
+        """
+        deadline = None if budget is None else time.monotonic() + budget
+        best_cost = math.inf
+
+        for _ in range(iterations or self.iter_max):
+            if stop is not None and stop.is_set() or deadline is not None and time.monotonic() > deadline:
+                return
+
+            x, y = self.sample(best_cost)
+            i = self.extend(self.V1, x, y)
+            if i >= 0:
+                self.connect(self.V1, i, self.V2)
+                cost, s, g = self.best_connection()
+                if cost < best_cost - 1e-9:
+                    best_cost = cost
+                    yield list(reversed(self.T_start.path(s))) + self.T_goal.path(g), cost
+
+            if len(self.V2) < len(self.V1):
+                self.V1, self.V2 = self.V2, self.V1
+
+    def sample(self, best_cost):
+        if best_cost == math.inf:
+            node = self.generate_random_node(self.s_goal, self.goal_sample_rate)
+            return node.x, node.y
+        return self.sample_informed(best_cost)
+
+    def sample_informed(self, best_cost):
+        """Uniform point of the workspace inside the ellipse of paths shorter than best_cost"""
+        delta = self.utils.delta
+        sx, sy, gx, gy = self.s_start.x, self.s_start.y, self.s_goal.x, self.s_goal.y
+        c_min = math.hypot(gx - sx, gy - sy)
+        a = best_cost / 2
+        b = math.sqrt(max(best_cost ** 2 - c_min ** 2, 0.0)) / 2
+        cos_t, sin_t = (gx - sx) / c_min, (gy - sy) / c_min
+
+        while True:
+            r, theta = math.sqrt(self.rng.random()), self.rng.uniform(0, 2 * math.pi)
+            u, v = a * r * math.cos(theta), b * r * math.sin(theta)
+            x = (sx + gx) / 2 + cos_t * u - sin_t * v
+            y = (sy + gy) / 2 + sin_t * u + cos_t * v
+            if self.x_range[0] + delta <= x <= self.x_range[1] - delta \
+                    and self.y_range[0] + delta <= y <= self.y_range[1] - delta:
+                return x, y
+
+    def radius(self, tree):
+        n = len(tree) + 1
+        return max(self.step_len, min(self.gamma * math.sqrt(math.log(n) / n),
+                                      REWIRE_RADIUS_STEPS * self.step_len))
+
+    def extend(self, tree, x, y):
+        """
+        Steps tree towards (x, y) with the cheapest visible parent nearby and
+        rewires the neighbours through the new node; its position, or -1.
+        """
+        near = tree.nearest(x, y)
+        nx, ny = tree.xy[near]
+        dist = math.hypot(x - nx, y - ny)
+        if dist > self.step_len:
+            x, y = nx + (x - nx) * self.step_len / dist, ny + (y - ny) * self.step_len / dist
+
+        candidates = np.array(tree.near(x, y, self.radius(tree)), dtype=np.int64)
+        points = tree.xy[candidates]
+        lengths = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        free = ~self.utils.is_collision_batch(points, np.broadcast_to((x, y), points.shape))
+        if not free.any():
+            return -1
+
+        total = np.where(free, tree.cost[candidates] + lengths, np.inf)
+        j = int(np.argmin(total))
+        i = tree.add(x, y, int(candidates[j]), float(total[j]))
+
+        for v, length in zip(candidates[free].tolist(), lengths[free].tolist()):
+            if tree.cost[i] + length < tree.cost[v] - 1e-12:
+                tree.rewire(v, i, tree.cost[i] + length)
+        return i
+
+    def connect(self, tree, i, other):
+        """Grows other greedily towards node i of tree and records every connection to i in sight"""
+        x, y = tree.xy[i]
+        while True:
+            j = self.extend(other, x, y)
+            if j < 0 or math.hypot(other.xy[j, 0] - x, other.xy[j, 1] - y) < 1e-9:
+                break
+
+        candidates = np.array(other.near(x, y, self.radius(other)), dtype=np.int64)
+        points = other.xy[candidates]
+        free = ~self.utils.is_collision_batch(points, np.broadcast_to((x, y), points.shape))
+        pairs = [(i, j) if tree is self.T_start else (j, i) for j in candidates[free].tolist()]
+        fresh = [k for k, pair in enumerate(pairs) if pair not in self.connected]
+        if not fresh:
+            return
+        self.connected.update(pairs[k] for k in fresh)
+
+        lo, hi = self.conn_count, self.conn_count + len(fresh)
+        while hi > len(self.conn_length):
+            self.conn_start = np.concatenate((self.conn_start, np.empty_like(self.conn_start)))
+            self.conn_goal = np.concatenate((self.conn_goal, np.empty_like(self.conn_goal)))
+            self.conn_length = np.concatenate((self.conn_length, np.empty_like(self.conn_length)))
+        self.conn_start[lo:hi], self.conn_goal[lo:hi] = np.array([pairs[k] for k in fresh]).T
+        self.conn_length[lo:hi] = np.hypot(points[free][fresh, 0] - x, points[free][fresh, 1] - y)
+        self.conn_count = hi
+
+        # Costs only drop, so the new pairs need only beat the current best
+        self._update_best(lo, hi)
+
+    def best_connection(self):
+        """(cost, node in T_start, node in T_goal) of the cheapest connection, or (inf, -1, -1)"""
+        rewires = self.T_start.rewires, self.T_goal.rewires
+        if rewires != self.best_rewires:
+            # Rewiring lowered some subtree costs: any stored pair may now be the cheapest
+            self.best = math.inf, -1, -1
+            self._update_best(0, self.conn_count)
+            self.best_rewires = rewires
+        return self.best
+
+    def _update_best(self, lo, hi):
+        if lo == hi:
+            return
+        s, g = self.conn_start[lo:hi], self.conn_goal[lo:hi]
+        costs = self.T_start.cost[s] + self.conn_length[lo:hi] + self.T_goal.cost[g]
+        k = int(np.argmin(costs))
+        if costs[k] < self.best[0]:
+            self.best = float(costs[k]), int(s[k]), int(g[k])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anytime RRT*-Connect")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds to keep improving")
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    x_start = (2, 2)  # Starting node
+    x_goal = (49, 24)  # Goal node
+
+    planner = RrtStarConnect(x_start, x_goal, 0.8, 0.05, args.iterations, seed=args.seed)
+    started = time.perf_counter()
+    path = []
+    for path, cost in planner.improving(budget=args.budget):
+        print(f"{time.perf_counter() - started:6.2f}s  cost {cost:.2f}  ({len(path)} points)")
+
+    planner.plotting.animation_connect(planner.T_start, planner.T_goal, path, "RRT*-CONNECT")
+
+
+if __name__ == "__main__":
+    main()
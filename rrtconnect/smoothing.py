@@ -0,0 +1,108 @@
+"""
+Shortcutting and smoothing of planner output
+
+A planner path is a chain of step-sized segments that zig-zags wherever the
+samples did. Greedy shortcutting jumps from each kept waypoint to the
+farthest one it can see, testing all candidates in one batch. Random
+shortcutting then joins pairs of points anywhere along the path, one batch
+of candidate pairs per round, keeping the one that saves the most.
+Smoothing cuts corners Chaikin-style, converging towards the quadratic
+B-spline of the waypoints, and keeps any corner whose cut would collide.
+"""
+
+import math
+import time
+
+import numpy as np
+
+RANDOM_ROUNDS = 100
+RANDOM_BATCH = 64
+
+
+def path_length(path):
+    return sum(math.dist(a, b) for a, b in zip(path, path[1:]))
+
+
+def shortcut_greedy(points, utils):
+    """Waypoints kept when each one jumps to the farthest later one in sight"""
+    keep = [0]
+    i = 0
+    while i < len(points) - 1:
+        ends = points[i + 1:]
+        free = np.flatnonzero(~utils.is_collision_batch(np.broadcast_to(points[i], ends.shape), ends))
+        i = i + 1 + int(free[-1]) if len(free) else i + 1
+        keep.append(i)
+    return points[keep]
+
+
+def shortcut_random(points, utils, rng, rounds=RANDOM_ROUNDS, batch=RANDOM_BATCH):
+    """Joins random pairs of points along the path when the straight segment is free"""
+    for _ in range(rounds):
+        if len(points) < 3:
+            break
+        lengths = np.hypot(*np.diff(points, axis=0).T)
+        along = np.concatenate(([0.0], np.cumsum(lengths)))
+        s = np.sort(rng.uniform(0.0, along[-1], (batch, 2)), axis=1)
+
+        # Segment each pair lands on, and the point there
+        seg = np.clip(np.searchsorted(along, s, side="right") - 1, 0, len(lengths) - 1)
+        f = np.divide(s - along[seg], lengths[seg], out=np.zeros_like(s), where=lengths[seg] > 0)
+        a = points[seg[:, 0]] + f[:, 0, None] * (points[seg[:, 0] + 1] - points[seg[:, 0]])
+        b = points[seg[:, 1]] + f[:, 1, None] * (points[seg[:, 1] + 1] - points[seg[:, 1]])
+
+        saved = (s[:, 1] - s[:, 0]) - np.hypot(*(b - a).T)
+        saved[seg[:, 0] == seg[:, 1]] = 0.0
+        saved[utils.is_collision_batch(a, b)] = 0.0
+        k = int(np.argmax(saved))
+        if saved[k] <= 1e-9:
+            continue
+        points = np.vstack((points[:seg[k, 0] + 1], a[k], b[k], points[seg[k, 1] + 1:]))
+    return points
+
+
+def smooth_corners(points, utils, iterations):
+    """Chaikin corner cutting; a corner stays sharp where its cut would hit an obstacle"""
+    for _ in range(iterations):
+        if len(points) < 3:
+            break
+        prev, corner, succ = points[:-2], points[1:-1], points[2:]
+        cut_in = 0.25 * prev + 0.75 * corner
+        cut_out = 0.75 * corner + 0.25 * succ
+        blocked = utils.is_collision_batch(cut_in, cut_out)
+
+        smoothed = [points[:1]]
+        for k in range(len(corner)):
+            smoothed.append(corner[k:k + 1] if blocked[k] else np.vstack((cut_in[k], cut_out[k])))
+        smoothed.append(points[-1:])
+        points = np.vstack(smoothed)
+    return points
+
+
+def shorten_path(path, utils, rng=None, rounds=RANDOM_ROUNDS, smooth_iterations=0):
+    """
+    (shortened path as a list of points, stats), where stats holds the
+    length and waypoint count before and after, the relative length
+    reduction and the seconds spent. path ends stay where they are.
+    """
+    started = time.perf_counter()
+    rng = rng if rng is not None else np.random.default_rng()
+
+    points = np.asarray(path, dtype=float)
+    # Drop repeated points, such as where the two trees meet
+    points = points[np.concatenate(([True], np.any(np.diff(points, axis=0) != 0, axis=1)))]
+    points = shortcut_greedy(points, utils)
+    points = shortcut_random(points, utils, rng, rounds)
+    points = shortcut_greedy(points, utils)
+    points = smooth_corners(points, utils, smooth_iterations)
+
+    shortened = [tuple(point) for point in points.tolist()]
+    before, after = path_length(path), path_length(shortened)
+    stats = {
+        "length_before": before,
+        "length_after": after,
+        "reduction": 1.0 - after / before if before > 0 else 0.0,
+        "waypoints_before": len(path),
+        "waypoints_after": len(shortened),
+        "seconds": time.perf_counter() - started,
+    }
+    return shortened, stats
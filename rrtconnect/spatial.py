@@ -0,0 +1,91 @@
+"""
+Grid hash over 2D points for nearest-neighbour and radius queries
+
+Points are bucketed by square cell. A nearest query scans rings of cells
+outward from the query point and stops once the best distance found is
+no more than the distance to the next ring. When a scan would visit more
+cells than there are points, one vectorized pass over all coordinates is
+cheaper and is used instead.
+"""
+
+import math
+import numpy as np
+
+
+class GridIndex:
+    def __init__(self, cell_size, capacity=64):
+        self.cell_size = cell_size
+        self.cells = {}  # (i, j) -> positions of the points in that cell
+        self.xy = np.empty((capacity, 2))  # point coordinates by position, grown by doubling
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def grow(self):
+        self.xy = np.concatenate((self.xy, np.empty_like(self.xy)))
+
+    def add(self, x, y):
+        """Indexes the point (x, y) and returns its position"""
+        i = self.size
+        if i == len(self.xy):
+            self.grow()
+        self.xy[i] = x, y
+        self.size += 1
+        self.cells.setdefault(self.cell(x, y), []).append(i)
+        return i
+
+    def nearest(self, x, y):
+        """Position of the closest point to (x, y), or -1 when the index is empty"""
+        if not self.size:
+            return -1
+        cx, cy = self.cell(x, y)
+        best, best_dist = -1, math.inf
+        ring = 0
+        while (2 * ring + 1) ** 2 <= self.size:
+            for key in _ring(cx, cy, ring):
+                for i in self.cells.get(key, ()):
+                    dist = math.hypot(self.xy[i, 0] - x, self.xy[i, 1] - y)
+                    if dist < best_dist:
+                        best, best_dist = i, dist
+            # Every cell outside the rings scanned so far is at least this far away
+            if best >= 0 and best_dist <= ring * self.cell_size:
+                return best
+            ring += 1
+
+        return int(np.argmin(self._distances(x, y)))
+
+    def near(self, x, y, radius):
+        """Positions of the points within radius of (x, y)"""
+        reach = math.ceil(radius / self.cell_size)
+        if (2 * reach + 1) ** 2 > self.size:
+            return np.flatnonzero(self._distances(x, y) <= radius).tolist()
+
+        cx, cy = self.cell(x, y)
+        found = []
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for k in self.cells.get((i, j), ()):
+                    if math.hypot(self.xy[k, 0] - x, self.xy[k, 1] - y) <= radius:
+                        found.append(k)
+        return found
+
+    def _distances(self, x, y):
+        xy = self.xy[:self.size]
+        return np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+
+
+def _ring(cx, cy, r):
+    """Cells at Chebyshev distance exactly r from (cx, cy)"""
+    if r == 0:
+        yield cx, cy
+        return
+    for x in range(cx - r, cx + r + 1):
+        yield x, cy - r
+        yield x, cy + r
+    for y in range(cy - r + 1, cy + r):
+        yield cx - r, y
+        yield cx + r, y
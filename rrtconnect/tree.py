@@ -0,0 +1,71 @@
+"""
+Array-backed search tree for the sampling-based planners
+
+Node coordinates and parent positions live in growable NumPy arrays, which
+take 24 bytes per node, and the tree indexes its own coordinates for
+nearest-neighbour queries. TreeNode is a small view of one row, so code
+written against node objects (x, y, parent) keeps working.
+"""
+
+import numpy as np
+
+from spatial import GridIndex
+
+
+class Tree(GridIndex):
+    def __init__(self, root, cell_size, capacity=1024):
+        self.parent = np.empty(capacity, dtype=np.int64)  # parent position, -1 at the root
+        super().__init__(cell_size, capacity)
+        self.add(root[0], root[1])
+
+    def __getitem__(self, i):
+        return TreeNode(self, i)
+
+    def __iter__(self):
+        return (TreeNode(self, i) for i in range(self.size))
+
+    def grow(self):
+        super().grow()
+        self.parent = np.concatenate((self.parent, np.empty_like(self.parent)))
+
+    def add(self, x, y, parent=-1):
+        i = super().add(x, y)
+        self.parent[i] = parent
+        return i
+
+    def append(self, node):
+        """Adds a node whose parent is a view of this tree, and returns its view"""
+        return self[self.add(node.x, node.y, -1 if node.parent is None else node.parent.index)]
+
+    def path(self, i):
+        """Coordinates from node i up to the root"""
+        positions = [i]
+        while self.parent[positions[-1]] >= 0:
+            positions.append(int(self.parent[positions[-1]]))
+        return [tuple(point) for point in self.xy[positions].tolist()]
+
+    def segments(self):
+        """float[n - 1, 2, 2]: every edge as (node, parent) coordinates, in insertion order"""
+        child = np.flatnonzero(self.parent[:self.size] >= 0)
+        return np.stack((self.xy[child], self.xy[self.parent[child]]), axis=1)
+
+
+class TreeNode:
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def x(self):
+        return float(self.tree.xy[self.index, 0])
+
+    @property
+    def y(self):
+        return float(self.tree.xy[self.index, 1])
+
+    @property
+    def parent(self):
+        p = int(self.tree.parent[self.index])
+        return None if p < 0 else TreeNode(self.tree, p)
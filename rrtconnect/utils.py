@@ -8,7 +8,7 @@ import numpy as np
 import os
 import sys
 import env
-from rrt_connect import Node 
+from distance_field import RESOLUTION, DistanceField
 
 
 class Utils:
@@ -19,111 +19,83 @@ class Utils:
         self.obs_circle = self.env.obs_circle
         self.obs_rectangle = self.env.obs_rectangle
         self.obs_boundary = self.env.obs_boundary
+        self.field = None  # DistanceField once build_field() has run
+        self.compile_obs()
 
     def update_obs(self, obs_cir, obs_bound, obs_rec):
         self.obs_circle = obs_cir
         self.obs_boundary = obs_bound
         self.obs_rectangle = obs_rec
+        self.compile_obs()
+        if self.field is not None:
+            self.build_field(self.field.resolution)
 
-    def get_obs_vertex(self):
+    def compile_obs(self):
+        """Obstacles inflated by delta, as arrays every check is vectorized over"""
         delta = self.delta
-        obs_list = []
 
-        for (ox, oy, w, h) in self.obs_rectangle:
-            vertex_list = [[ox - delta, oy - delta],
-                           [ox + w + delta, oy - delta],
-                           [ox + w + delta, oy + h + delta],
-                           [ox - delta, oy + h + delta]]
-            obs_list.append(vertex_list)
+        circles = np.array(self.obs_circle, dtype=float).reshape(-1, 3)
+        self.circle_centers = circles[:, :2]
+        self.circle_radii = circles[:, 2] + delta
 
-        return obs_list
+        # Rectangles and boundary walls alike, as [x_min, y_min] and [x_max, y_max] rows
+        boxes = np.array(list(self.obs_rectangle) + list(self.obs_boundary), dtype=float).reshape(-1, 4)
+        self.box_min = boxes[:, :2] - delta
+        self.box_max = boxes[:, :2] + boxes[:, 2:] + delta
 
-    def is_intersect_rec(self, start, end, o, d, a, b):
-        v1 = [o[0] - a[0], o[1] - a[1]]
-        v2 = [b[0] - a[0], b[1] - a[1]]
-        v3 = [-d[1], d[0]]
-
-        div = np.dot(v2, v3)
-
-        if div == 0:
-            return False
-
-        t1 = np.linalg.norm(np.cross(v2, v1)) / div
-        t2 = np.dot(v1, v3) / div
-
-        if t1 >= 0 and 0 <= t2 <= 1:
-            shot = Node((o[0] + t1 * d[0], o[1] + t1 * d[1]))
-            dist_obs = self.get_dist(start, shot)
-            dist_seg = self.get_dist(start, end)
-            if dist_obs <= dist_seg:
-                return True
-
-        return False
-
-    def is_intersect_circle(self, o, d, a, r):
-        d2 = np.dot(d, d)
-        delta = self.delta
-
-        if d2 == 0:
-            return False
-
-        t = np.dot([a[0] - o[0], a[1] - o[1]], d) / d2
-
-        if 0 <= t <= 1:
-            shot = Node((o[0] + t * d[0], o[1] + t * d[1]))
-            if self.get_dist(shot, Node(a)) <= r + delta:
-                return True
-
-        return False
+    def build_field(self, resolution=RESOLUTION):
+        """Rasterizes the obstacles so most single checks become array lookups"""
+        self.field = DistanceField.from_utils(self, resolution)
 
     def is_collision(self, start, end):
-        if self.is_inside_obs(start) or self.is_inside_obs(end):
-            return True
-
-        o, d = self.get_ray(start, end)
-        obs_vertex = self.get_obs_vertex()
-
-        for (v1, v2, v3, v4) in obs_vertex:
-            if self.is_intersect_rec(start, end, o, d, v1, v2):
-                return True
-            if self.is_intersect_rec(start, end, o, d, v2, v3):
-                return True
-            if self.is_intersect_rec(start, end, o, d, v3, v4):
-                return True
-            if self.is_intersect_rec(start, end, o, d, v4, v1):
-                return True
-
-        for (x, y, r) in self.obs_circle:
-            if self.is_intersect_circle(o, d, [x, y], r):
-                return True
-
-        return False
+        if self.field is not None:
+            hit = self.field.is_collision(start.x, start.y, end.x, end.y)
+            if hit is not None:
+                return hit
+        return bool(self.is_collision_batch([[start.x, start.y]], [[end.x, end.y]])[0])
+
+    def is_collision_batch(self, starts, ends):
+        """
+        bool[K]: whether each segment starts[k] -> ends[k] touches an inflated
+        obstacle, tested against every obstacle at once.
+        """
+        o = np.asarray(starts, dtype=float)[:, None, :]  # [K, 1, 2]
+        d = np.asarray(ends, dtype=float)[:, None, :] - o
+
+        # Circles: the closest point of the segment to the centre is within the radius
+        c = self.circle_centers[None, :, :] - o
+        d2 = np.broadcast_to((d * d).sum(axis=2), c.shape[:2])
+        t = np.clip(np.divide((c * d).sum(axis=2), d2, out=np.zeros(c.shape[:2]), where=d2 > 0), 0.0, 1.0)
+        gap = c - t[:, :, None] * d
+        hit = ((gap * gap).sum(axis=2) <= self.circle_radii ** 2).any(axis=1)
+
+        # Boxes: slab test, the parameter ranges inside each axis band overlap within [0, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t1 = (self.box_min[None, :, :] - o) / d
+            t2 = (self.box_max[None, :, :] - o) / d
+        inside_band = (self.box_min[None, :, :] <= o) & (o <= self.box_max[None, :, :])
+        parallel = d == 0
+        t_enter = np.where(parallel, np.where(inside_band, -np.inf, np.inf), np.minimum(t1, t2)).max(axis=2)
+        t_exit = np.where(parallel, np.where(inside_band, np.inf, -np.inf), np.maximum(t1, t2)).min(axis=2)
+        hit |= ((t_enter <= t_exit) & (t_enter <= 1.0) & (t_exit >= 0.0)).any(axis=1)
+
+        return hit
 
     def is_inside_obs(self, node):
-        delta = self.delta
-
-        for (x, y, r) in self.obs_circle:
-            if math.hypot(node.x - x, node.y - y) <= r + delta:
-                return True
-
-        for (x, y, w, h) in self.obs_rectangle:
-            if 0 <= node.x - (x - delta) <= w + 2 * delta \
-                    and 0 <= node.y - (y - delta) <= h + 2 * delta:
-                return True
-
-        for (x, y, w, h) in self.obs_boundary:
-            if 0 <= node.x - (x - delta) <= w + 2 * delta \
-                    and 0 <= node.y - (y - delta) <= h + 2 * delta:
-                return True
-
-        return False
-
-    @staticmethod
-    def get_ray(start, end):
-        orig = [start.x, start.y]
-        direc = [end.x - start.x, end.y - start.y]
-        return orig, direc
+        if self.field is not None:
+            inside = self.field.is_inside(node.x, node.y)
+            if inside is not None:
+                return inside
+        return bool(self.is_inside_obs_batch([[node.x, node.y]])[0])
+
+    def is_inside_obs_batch(self, points):
+        """bool[K]: whether each point lies in an inflated obstacle"""
+        p = np.asarray(points, dtype=float)[:, None, :]
+        gap = p - self.circle_centers[None, :, :]
+        in_circle = ((gap * gap).sum(axis=2) <= self.circle_radii ** 2).any(axis=1)
+        in_box = ((self.box_min <= p) & (p <= self.box_max)).all(axis=2).any(axis=1)
+        return in_circle | in_box
 
     @staticmethod
     def get_dist(start, end):
-        return math.hypot(end.x - start.x, end.y - start.y)
\ No newline at end of file
+        return math.hypot(end.x - start.x, end.y - start.y)